@@ -0,0 +1,219 @@
+"""
+Multi-session load test: starts the app under `streamlit run` and drives
+concurrent sessions over Streamlit's websocket protocol, each switching
+company and page through the sidebar "Select Company" and "Navigation"
+controls as an analyst would. For each session count it reports p50/p95/p99
+rerun latency, reruns per second, server CPU in cores and server memory per
+session, then the session count at which the worker saturates.
+
+    python benchmarks/loadtest.py [--sessions 1 2 4 8 16 32] [--duration 20]
+    python benchmarks/loadtest.py --companies 10000 --think 2
+
+By default the app serves a synthetic universe of `--companies` companies
+(see benchmarks/pages.py); `--data-dir` serves a panel directory instead.
+Server CPU and memory come from /proc, so they are only reported on Linux.
+"""
+import argparse
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+SESSION_COUNTS = (1, 2, 4, 8, 16, 32)
+
+# A session count saturates the worker once its throughput is within this
+# fraction of the best throughput measured
+SATURATION_MARGIN = 0.1
+
+# Seconds to wait for one rerun before counting the session as stuck
+RERUN_TIMEOUT = 120
+
+def free_port():
+    with socket.socket() as probe:
+        probe.bind(('localhost', 0))
+        return probe.getsockname()[1]
+
+def start_server(data_dir, port):
+    """`streamlit run` the app on `port` serving `data_dir`, once its health check passes"""
+    server = subprocess.Popen(
+        [
+            sys.executable, '-m', 'streamlit', 'run', os.path.join(ROOT, 'Dashboard.py'),
+            '--server.headless', 'true', '--server.port', str(port),
+            '--server.fileWatcherType', 'none', '--browser.gatherUsageStats', 'false',
+        ],
+        cwd=ROOT, env={**os.environ, 'DASHBOARD_DATA_DIR': data_dir},
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(f'http://localhost:{port}/_stcore/health', timeout=1) as reply:
+                if reply.status == 200:
+                    return server
+        except OSError:
+            time.sleep(0.2)
+    server.kill()
+    raise RuntimeError("Streamlit server did not become healthy within 60 s")
+
+def process_stats(pid):
+    """(CPU seconds, resident bytes) of a process from /proc, or None off Linux"""
+    try:
+        with open(f'/proc/{pid}/stat') as stat:
+            fields = stat.read().rsplit(')', 1)[1].split()
+        with open(f'/proc/{pid}/statm') as statm:
+            resident_pages = int(statm.read().split()[1])
+    except OSError:
+        return None
+    cpu = (int(fields[11]) + int(fields[12])) / os.sysconf('SC_CLK_TCK')
+    return cpu, resident_pages * os.sysconf('SC_PAGE_SIZE')
+
+class Session:
+    """One browser tab: a websocket to the app and the widget values it has chosen"""
+
+    def __init__(self, websocket, rng):
+        self.websocket = websocket
+        self.rng = rng
+        self.widgets = {}
+        self.values = {}
+        self.errors = 0
+
+    async def rerun(self):
+        """Rerun the script with the chosen widget values; returns the latency in seconds"""
+        from streamlit.proto.BackMsg_pb2 import BackMsg
+        from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+        message = BackMsg()
+        message.rerun_script.query_string = ''
+        for widget_id, value in self.values.items():
+            state = message.rerun_script.widget_states.widgets.add()
+            state.id = widget_id
+            state.string_value = value
+
+        start = time.perf_counter()
+        await self.websocket.send(message.SerializeToString())
+        while True:
+            reply = ForwardMsg()
+            reply.ParseFromString(await self.websocket.recv())
+            kind = reply.WhichOneof('type')
+            if kind == 'delta' and reply.delta.WhichOneof('type') == 'new_element':
+                element = reply.delta.new_element
+                element_type = element.WhichOneof('type')
+                if element_type in ('selectbox', 'radio'):
+                    widget = getattr(element, element_type)
+                    self.widgets[widget.label] = (widget.id, list(widget.options))
+                elif element_type == 'exception':
+                    self.errors += 1
+            elif kind == 'script_finished' and reply.script_finished in (
+                ForwardMsg.FINISHED_SUCCESSFULLY, ForwardMsg.FINISHED_WITH_COMPILE_ERROR
+            ):
+                return time.perf_counter() - start
+
+    def choose(self, label):
+        """Pick a random option of the sidebar control labelled `label`"""
+        widget_id, options = self.widgets[label]
+        self.values[widget_id] = options[self.rng.integers(len(options))]
+
+    async def act(self):
+        """Switch page or company, as a user would, and time the rerun"""
+        self.choose("Navigation" if self.rng.random() < 0.5 else "Select Company")
+        return await asyncio.wait_for(self.rerun(), RERUN_TIMEOUT)
+
+async def run_level(url, n_sessions, duration, think, seed, server_pid):
+    """Drive `n_sessions` concurrent sessions for `duration` seconds; one result row"""
+    from websockets.asyncio.client import connect
+
+    before = process_stats(server_pid)
+    sockets = [
+        await connect(url, subprotocols=['streamlit'], max_size=None) for _ in range(n_sessions)
+    ]
+    sessions = [Session(websocket, np.random.default_rng([seed, s])) for s, websocket in enumerate(sockets)]
+    try:
+        await asyncio.gather(*(session.rerun() for session in sessions))
+        opened = process_stats(server_pid)
+
+        latencies = []
+        deadline = time.perf_counter() + duration
+
+        async def drive(session):
+            while time.perf_counter() < deadline:
+                latencies.append(await session.act())
+                if think:
+                    await asyncio.sleep(session.rng.exponential(think))
+
+        start = time.perf_counter()
+        await asyncio.gather(*(drive(session) for session in sessions))
+        wall = time.perf_counter() - start
+        after = process_stats(server_pid)
+    finally:
+        for websocket in sockets:
+            await websocket.close()
+
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) if latencies else (np.nan,) * 3
+    return {
+        'sessions': n_sessions,
+        'reruns': len(latencies),
+        'errors': sum(session.errors for session in sessions),
+        'throughput': len(latencies) / wall,
+        'p50': p50, 'p95': p95, 'p99': p99,
+        'cores': (after[0] - opened[0]) / wall if before else np.nan,
+        'session_mb': (opened[1] - before[1]) / n_sessions / 2**20 if before else np.nan,
+        'server_mb': after[1] / 2**20 if before else np.nan,
+    }
+
+def saturation_point(rows):
+    """The first row whose throughput is within SATURATION_MARGIN of the best"""
+    best = max(row['throughput'] for row in rows)
+    return next(row for row in rows if row['throughput'] >= (1 - SATURATION_MARGIN) * best)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--sessions', type=int, nargs='+', default=SESSION_COUNTS, help="Concurrent session counts")
+    parser.add_argument('--duration', type=float, default=20, help="Seconds of load per session count")
+    parser.add_argument('--think', type=float, default=0, help="Mean pause between a session's actions (s)")
+    parser.add_argument('--companies', type=int, default=1_000, help="Companies in the synthetic universe")
+    parser.add_argument('--periods', type=int, default=40, help="Quarters per synthetic company")
+    parser.add_argument('--data-dir', help="Serve this panel directory instead of a synthetic universe")
+    parser.add_argument('--seed', type=int, default=0, help="Seed of the sessions' choices")
+    args = parser.parse_args(argv)
+
+    if args.data_dir:
+        data_dir = os.path.abspath(args.data_dir)
+    else:
+        from pages import universe_dir
+        data_dir = universe_dir(args.companies, args.periods)
+
+    port = free_port()
+    url = f'ws://localhost:{port}/_stcore/stream'
+    server = start_server(data_dir, port)
+    try:
+        # One session first, so data loading is not charged to the first level
+        asyncio.run(run_level(url, 1, 0, 0, args.seed, server.pid))
+
+        print(f"{'sessions':>8} {'reruns':>7} {'errors':>6} {'rerun/s':>8} {'p50 ms':>8} {'p95 ms':>8} "
+              f"{'p99 ms':>8} {'cores':>6} {'MB/session':>10} {'server MB':>9}")
+        rows = []
+        for n_sessions in args.sessions:
+            row = asyncio.run(run_level(url, n_sessions, args.duration, args.think, args.seed, server.pid))
+            rows.append(row)
+            print(f"{row['sessions']:>8} {row['reruns']:>7} {row['errors']:>6} {row['throughput']:>8.2f} "
+                  f"{row['p50'] * 1000:>8.0f} {row['p95'] * 1000:>8.0f} {row['p99'] * 1000:>8.0f} "
+                  f"{row['cores']:>6.2f} {row['session_mb']:>10.1f} {row['server_mb']:>9.0f}")
+    finally:
+        server.terminate()
+        server.wait()
+
+    knee = saturation_point(rows)
+    print(f"Saturates at {knee['sessions']} sessions: {knee['throughput']:.2f} reruns/s with the server "
+          f"at {knee['cores']:.2f} cores, p95 {knee['p95'] * 1000:.0f} ms; more sessions only queue")
+    return 1 if any(row['errors'] for row in rows) else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,219 @@
+"""
+Load, compute and render benchmark of every dashboard page over synthetic
+universes of 2, 100, 1,000 and 10,000 companies × 40 quarters. Each universe
+runs in its own interpreter and reports the median of `--repeat` timings per
+stage:
+
+    load          read_panel_file over the universe's panel files
+    store         RatioStore construction from the panels, ratio engine included
+    health, sector_index, registry
+                  the per-data-version models behind the pages
+    page:<page>   every figure and table of a page built from a cold figure
+                  cache, with one figure:<page>/<k> stage per emitted figure
+    draw:<page>   a full warm script run of the page through AppTest, all
+                  sections shown: Streamlit serialization and styled tables
+
+    python benchmarks/pages.py [--sizes 2 100 1000] [--repeat 3] [--save]
+    python benchmarks/pages.py --compare [--tolerance 0.25]
+
+`--save` appends the run, keyed by git commit, to the history file;
+`--compare` fails (exit status 1) when a stage is slower than in the latest
+saved run of another commit by more than the tolerance.
+"""
+import argparse
+import datetime
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+UNIVERSE_SIZES = (2, 100, 1_000, 10_000)
+UNIVERSE_PERIODS = 40
+BENCHMARK_DIR = os.path.join(ROOT, '.benchmarks')
+HISTORY_FILE = os.path.join(BENCHMARK_DIR, 'pages.jsonl')
+
+# Slowdowns below this many seconds are timer noise, whatever the ratio
+NOISE_FLOOR = 0.002
+
+def universe_dir(n_companies, n_periods):
+    """
+    Panel directory of a synthetic universe, generated on first use and
+    reused by later runs. Statements are included, so loading runs the
+    ratio engine as it does for real filings.
+    """
+    from dashboard_core import write_synthetic_panels
+
+    directory = os.path.join(BENCHMARK_DIR, 'data', f'{n_companies}x{n_periods}')
+    done = os.path.join(directory, '.complete')
+    if not os.path.exists(done):
+        write_synthetic_panels(directory, n_companies, n_periods, statements=True)
+        open(done, 'w').close()
+    return directory
+
+def timed(function, *args, repeat):
+    """(median seconds over `repeat` calls, last result)"""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function(*args)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times), result
+
+class TimedSink(list):
+    """Report sink that also records the time spent building each figure it receives"""
+
+    def __init__(self):
+        super().__init__()
+        self.times = []
+        self._last = time.perf_counter()
+
+    def append(self, figure):
+        now = time.perf_counter()
+        self.times.append(now - self._last)
+        super().append(figure)
+        self._last = now
+
+def figure_title(figure):
+    """Short label of an emitted figure: its title, or its first trace type"""
+    title = figure.layout.title.text
+    if title:
+        return title.split('<')[0].split(' (')[0].strip()[:40]
+    return figure.data[0].type if figure.data else 'figure'
+
+def run_universe(repeat):
+    """Benchmark the universe in DASHBOARD_DATA_DIR; stage name → median seconds"""
+    import Dashboard as app
+    from dashboard_core import (
+        scan_panel_files, panel_files_version, read_panel_file, RatioStore, score_health, SectorIndex,
+        CompanyRegistry,
+    )
+    from streamlit.testing.v1 import AppTest
+
+    app.quiet_streamlit()
+    results = {}
+    panel_files = scan_panel_files()
+    results['load'], panels = timed(lambda: [read_panel_file(*entry) for entry in panel_files], repeat=repeat)
+    results['store'], store = timed(RatioStore.from_panels, panels, repeat=repeat)
+    results['health'], _ = timed(score_health, store, repeat=repeat)
+    results['sector_index'], _ = timed(SectorIndex, store, repeat=repeat)
+    results['registry'], _ = timed(CompanyRegistry.from_store, store, repeat=repeat)
+
+    version = panel_files_version(panel_files)
+    store = app.load_ratio_store(panel_files, version)
+    registry = app.load_company_registry(panel_files, version)
+    data = store.view(registry.keys[0])
+    # Warm the per-data-version caches (health scores, sector index) first,
+    # so page timings cover only what a page rebuilds on each view
+    for page in app.PAGES:
+        app.page_figures(page, data, registry, 0)
+    for page in app.PAGES:
+        page_times, figure_times = [], []
+        for _ in range(repeat):
+            app.figure_cache().invalidate(lambda key: True)
+            sink = TimedSink()
+            token = app.REPORT_SINK.set(sink)
+            start = time.perf_counter()
+            try:
+                app.show_page(page, data, registry, 0)
+            finally:
+                app.REPORT_SINK.reset(token)
+            page_times.append(time.perf_counter() - start)
+            figure_times.append(sink.times)
+        results[f'page:{page}'] = statistics.median(page_times)
+        for k, figure in enumerate(sink, 1):
+            results[f'figure:{page}/{k:02d} {figure_title(figure)}'] = statistics.median(
+                times[k - 1] for times in figure_times
+            )
+
+    session = AppTest.from_file(os.path.join(ROOT, 'Dashboard.py'), default_timeout=600).run()
+    session.toggle(key='lazy_sections').set_value(False).run()
+    for page in app.PAGES:
+        session.sidebar.radio[0].set_value(page).run()
+        if session.exception:
+            raise RuntimeError(f"{page}: {session.exception[0].message}")
+        results[f'draw:{page}'], _ = timed(session.run, repeat=repeat)
+    return results
+
+def git_commit():
+    """Short hash of HEAD, marked dirty when the tree has local changes"""
+    def git(*args):
+        return subprocess.run(['git', *args], cwd=ROOT, capture_output=True, text=True).stdout.strip()
+    commit = git('rev-parse', '--short', 'HEAD') or 'unknown'
+    return commit + ('-dirty' if git('status', '--porcelain', '--untracked-files=no') else '')
+
+def load_history(path):
+    try:
+        with open(path) as history:
+            return [json.loads(line) for line in history if line.strip()]
+    except FileNotFoundError:
+        return []
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=UNIVERSE_SIZES, help="Companies per universe")
+    parser.add_argument('--periods', type=int, default=UNIVERSE_PERIODS, help="Quarters per company")
+    parser.add_argument('--repeat', type=int, default=3, help="Timings per stage")
+    parser.add_argument('--save', action='store_true', help="Append the results to the history file")
+    parser.add_argument('--compare', action='store_true', help="Fail on regressions against the history")
+    parser.add_argument('--tolerance', type=float, default=0.25, help="Allowed slowdown, as a fraction")
+    parser.add_argument('--history', default=HISTORY_FILE, help="Results history (JSON lines)")
+    parser.add_argument('--universe', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.universe:
+        # Child process: one universe, results as JSON on stdout
+        print(json.dumps(run_universe(args.repeat)))
+        return 0
+
+    results = {}
+    for size in args.sizes:
+        directory = universe_dir(size, args.periods)
+        child = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), '--universe', directory, '--repeat', str(args.repeat)],
+            cwd=ROOT, env={**os.environ, 'DASHBOARD_DATA_DIR': directory},
+            capture_output=True, text=True
+        )
+        if child.returncode:
+            print(child.stderr, file=sys.stderr)
+            return child.returncode
+        for stage, seconds in json.loads(child.stdout.strip().splitlines()[-1]).items():
+            results[f'{size}x{args.periods}/{stage}'] = seconds
+            print(f"{size:>6} × {args.periods}  {stage:<58} {seconds * 1000:10.1f} ms")
+
+    commit = git_commit()
+    failures = []
+    if args.compare:
+        baseline = next(
+            (run for run in reversed(load_history(args.history)) if run['commit'] != commit), None
+        )
+        if baseline is None:
+            print("No saved run of another commit to compare against", file=sys.stderr)
+        else:
+            for stage, seconds in results.items():
+                before = baseline['results'].get(stage)
+                if before is not None and seconds > before * (1 + args.tolerance) and seconds - before > NOISE_FLOOR:
+                    failures.append(
+                        f"{stage}: {seconds * 1000:.1f} ms, up from {before * 1000:.1f} ms at {baseline['commit']}"
+                    )
+
+    if args.save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.history)), exist_ok=True)
+        with open(args.history, 'a') as history:
+            history.write(json.dumps({
+                'commit': commit,
+                'date': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+                'python': sys.version.split()[0],
+                'results': results,
+            }) + '\n')
+
+    for failure in failures:
+        print(f"FAIL: {failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,92 @@
+"""
+Restatement check and benchmark: applies random line-item restatements to
+synthetic annual, quarterly and monthly statement panels with
+RatioStore.restate(), then rebuilds each store from the edited data with
+RatioStore.from_nested() and requires the same ratio values, validity bitmap
+and first/last valid periods. Reports the time of one restatement against a
+full rebuild.
+
+    python benchmarks/restate.py [--companies 200] [--periods 40] [--restatements 50]
+
+Exits with status 1 when a restated store differs from its rebuild.
+"""
+import argparse
+import copy
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+FREQUENCIES = ('Y', 'Q', 'M')
+
+def check_frequency(frequency, n_companies, n_periods, n_restatements, seed):
+    """(mismatch descriptions, restate seconds per call, rebuild seconds) for one panel frequency"""
+    from dashboard_core import LINE_ITEMS, RatioStore, iter_synthetic_panels, synthetic_period_labels
+
+    data = {'years': synthetic_period_labels(n_periods, frequency)}
+    data.update(iter_synthetic_panels(n_companies, n_periods, frequency, seed, statements=True))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        store = RatioStore.from_nested(data)
+    edited = copy.deepcopy(data)
+
+    rng = np.random.default_rng([seed, n_companies])
+    keys = [key for key in data if key != 'years']
+    times = []
+    for _ in range(n_restatements):
+        key = keys[rng.integers(len(keys))]
+        t = int(rng.integers(n_periods))
+        names = rng.choice(LINE_ITEMS, size=rng.integers(1, 4), replace=False)
+        statement = edited[key]['statement']
+        # Scale the reported values; a missing one is restated as reported at 1.0
+        items = {
+            str(name): float(np.nan_to_num(statement[name][t], nan=1.0) * rng.uniform(0.5, 1.5))
+            for name in names
+        }
+        for name, value in items.items():
+            statement[name][t] = value
+        start = time.perf_counter()
+        with np.errstate(divide='ignore', invalid='ignore'):
+            store.restate(key, data['years'][t], **items)
+        times.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rebuilt = RatioStore.from_nested(edited)
+    rebuild = time.perf_counter() - start
+
+    mismatches = []
+    if not np.allclose(store.values, rebuilt.values, rtol=1e-9, atol=1e-12, equal_nan=True):
+        bad = ~np.isclose(store.values, rebuilt.values, rtol=1e-9, atol=1e-12, equal_nan=True)
+        mismatches.append(f"values differ at {int(bad.sum())} cells, first at {tuple(int(i) for i in np.argwhere(bad)[0])}")
+    for name in ('valid', 'first_valid', 'last_valid'):
+        if not np.array_equal(getattr(store, name), getattr(rebuilt, name)):
+            mismatches.append(f"{name} differs")
+    return mismatches, statistics.median(times), rebuild
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--companies', type=int, default=200, help="Companies per synthetic panel")
+    parser.add_argument('--periods', type=int, default=40, help="Periods per company")
+    parser.add_argument('--restatements', type=int, default=50, help="Restatements applied per panel")
+    parser.add_argument('--frequencies', nargs='+', choices=FREQUENCIES, default=FREQUENCIES)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    failed = False
+    for frequency in args.frequencies:
+        mismatches, restate, rebuild = check_frequency(
+            frequency, args.companies, args.periods, args.restatements, args.seed
+        )
+        status = "ok" if not mismatches else "FAIL: " + "; ".join(mismatches)
+        print(f"{frequency}  {args.companies} × {args.periods}  restate {restate * 1000:7.3f} ms  "
+              f"rebuild {rebuild * 1000:8.1f} ms  {status}")
+        failed |= bool(mismatches)
+    return 1 if failed else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,69 @@
+"""
+Cold-start benchmark: imports each target in fresh interpreters with
+`-X importtime` and fails (exit status 1) when the median cumulative import
+time of a target exceeds its budget, or when a module that should load lazily
+was imported at startup.
+
+    python benchmarks/startup.py [--runs 7] [--scale 1.5]
+
+`--scale` multiplies every budget, for slower machines.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Target module → (modules already imported when it loads, import-time
+# budget in seconds, modules that must not be imported by then). Under
+# `streamlit run` the server has imported Streamlit before the script starts.
+STARTUP_BUDGETS = {
+    'dashboard_core': ((), 0.25, ('pandas', 'plotly', 'pyarrow', 'streamlit')),
+    'Dashboard': (('streamlit',), 0.35, ('pandas', 'plotly.subplots', 'pyarrow.parquet', 'xlsxwriter')),
+}
+
+def measure(target, preloaded, deferred):
+    """(seconds spent importing `target`, deferred modules it loaded) in one fresh interpreter"""
+    code = ''.join(f"import {name}; " for name in preloaded) + (
+        f"import {target}, sys, json; "
+        f"print(json.dumps([name for name in {list(deferred)!r} if name in sys.modules]))"
+    )
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        cwd=ROOT, env={**os.environ, 'PYTHONPATH': ROOT}, capture_output=True, text=True, check=True
+    )
+    cumulative = None
+    for line in result.stderr.splitlines():
+        if line.startswith('import time:') and line.rsplit('|', 1)[-1].strip() == target:
+            cumulative = int(line.split('|')[1]) / 1e6
+    loaded = json.loads(result.stdout.strip().splitlines()[-1])
+    return cumulative, loaded
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--runs', type=int, default=7, help="Fresh interpreters per target")
+    parser.add_argument('--scale', type=float, default=1.0, help="Multiplier for every budget")
+    args = parser.parse_args(argv)
+
+    failures = []
+    for target, (preloaded, budget, deferred) in STARTUP_BUDGETS.items():
+        runs = [measure(target, preloaded, deferred) for _ in range(args.runs)]
+        median = statistics.median(seconds for seconds, _ in runs)
+        loaded = sorted({name for _, names in runs for name in names})
+        limit = budget * args.scale
+        ok = median <= limit and not loaded
+        print(f"{target:<16} median {median * 1000:7.1f} ms  budget {limit * 1000:7.1f} ms  {'ok' if ok else 'FAIL'}")
+        if median > limit:
+            failures.append(f"{target} imports in {median * 1000:.1f} ms, over its {limit * 1000:.1f} ms budget")
+        if loaded:
+            failures.append(f"{target} imports {', '.join(loaded)} at startup; these should load on first use")
+
+    for failure in failures:
+        print(f"FAIL: {failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
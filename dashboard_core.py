@@ -0,0 +1,2260 @@
+"""
+Streamlit-free core of the financial dashboard: panel loading, the ratio
+engine and RatioStore, company registry, health scoring, sector index, peer
+comparison, bulk downloads and the cacheable Plotly figure builders.
+
+Dashboard.py is the Streamlit app on top of it. Batch jobs and notebooks
+import this module directly:
+
+    from dashboard_core import build_ratio_store, score_health
+    store = build_ratio_store(scan_panel_files())
+    scores = score_health(store)
+"""
+import numpy as np
+from collections import OrderedDict
+from collections.abc import Mapping
+import bisect
+import concurrent.futures
+import contextlib
+import functools
+import graphlib
+import hashlib
+import importlib
+import importlib.util
+import os
+import re
+import tempfile
+import threading
+import time
+import warnings
+
+class LazyModule:
+    """
+    Stand-in for a module that is imported on first attribute access, so
+    importing this module stays cheap for callers that never touch pandas or
+    Plotly. Fetched attributes are cached on the stand-in.
+    """
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+        self._lock = threading.Lock()
+
+    def __getattr__(self, attr):
+        if self._module is None:
+            with self._lock:
+                if self._module is None:
+                    self._module = importlib.import_module(self._name)
+        value = getattr(self._module, attr)
+        setattr(self, attr, value)
+        return value
+
+pd = LazyModule('pandas')
+go = LazyModule('plotly.graph_objects')
+plotly_subplots = LazyModule('plotly.subplots')
+plotly_colors = LazyModule('plotly.colors')
+
+# Financial Data for Tata Power and NTPC
+def builtin_financial_data():
+    """
+    Built-in financial data for Tata Power and NTPC, used when DATA_DIR has
+    no panel files.
+    Note: DCF/WACC/FCFF data structures are excluded as per the user's request
+    to focus on ratios and core statements.
+    """
+
+    # Years
+    years = ['Mar-17', 'Mar-18', 'Mar-19', 'Mar-20', 'Mar-21', 'Mar-22', 'Mar-23', 'Mar-24', 'Mar-25']
+
+    # Tata Power Data
+    tata_power = {
+        'years': years,
+        'profile': {'name': 'Tata Power', 'ticker': 'TATAPOWER', 'sector': 'Power Utilities'},
+        'liquidity': {
+            'Current Ratio': [0.518655, 0.582777, 0.5546495389, 0.5081413714, 0.4972524607, 0.5773965982, 0.436187446, 0.5013131566, 0.503644],
+            'Quick Ratio': [0.415738, 0.508909, 0.4554608488, 0.4124541492, 0.4108945904, 0.5029767659, 0.3273541152, 0.3945146593, 0.404002],
+            'Cash Ratio': [0.013031, 0.004439, 0.007562067928, 0.01544383555, 0.013526274, 0.005385190, 0.01593644379, 0.0379227604, 0.096566]
+        },
+        'solvency': {
+            'Debt-to-Equity Ratio': [0.68, 0.96, 1.09, 1.17, 1.11, 2.27, 1.60, 1.24, 0.92],
+            'Debt Ratio': [0.28, 0.34, 0.41, 0.43, 0.44, 0.52, 0.45, 0.39, 0.32],
+            'Times Interest Earned': [1.392997, -1.31688, 2.4804279, 0.9604735232, 1.673189489, 2.04615476, 2.84629929, 2.112361293, np.nan] # Mar-25 TIE is NaN in provided data
+        },
+        'profitability': {
+            'Gross Profit Margin (%)': [64.52339, 62.33786, 58.67014, 61.208375, 63.78407844, 47.73594115, 38.48234805, 37.38805919, 43.82389],
+            'Operating Profit Margin (%)': [53.76025, 51.98377, 48.57164029, 51.28288448, 51.57270629, 40.66657491, 33.86958429, 32.23913514, 38.87031],
+            'Net Profit Margin (%)': [5.020154, -37.2141, 20.16393816, 1.782643179, 12.40250082, 19.74403762, 14.98131633, 10.16078284, 12.60691],
+            'Return on Assets (ROA) (%)': [0.97, -8.63, 4.64, 0.39, 2.15, 5.90, 6.78, 4.42, 5.95],
+            'Return on Equity (ROE) (%)': [0.97, -8.63, 4.64, 0.39, 2.15, 5.90, 6.78, 4.42, 5.95]
+        },
+        'dupont_3': {
+            'Net Profit Margin': [0.050201, -0.37214, 0.2016393816, 0.01782643179, 0.1240250082, 0.1974403762, 0.1498131633, 0.1016078284, 0.126069],
+            'Asset Turnover': [np.nan, 0.218942, 0.2350480628, 0.2193767322, 0.184618508, 0.3131453467, 0.4576536271, 0.4448688579, 0.481876],
+            'Equity Multiplier': [2.460979, 2.810331, 2.687502114, 2.733364482, 2.539846409, 4.334031876, 3.516361439, 3.198000844, 2.866505],
+            'ROE': [np.nan, -0.228978, 0.1273740177, 0.01068938037, 0.0581556555, 0.2679625077, 0.2410906633, 0.1445565412, 0.174139]
+        },
+        'dupont_5': {
+            'Tax Burden': [0.767051, 0.949999, 0.7962956293, -2.481072027, 0.9012441071, 1.215269196, 0.7949218798, 0.8880012743, 0.866501],
+            'Interest Burden': [518.27, -3316.34, 2221.16, -59.7, 1022.42, 2289.97, 4110.97, 2511.10, 3615.32],
+            'Operating Margin': [0.1217139, -0.753557, 0.5213336475, 0.0140146678, 0.2668375256, 0.3995083715, 0.5564365602, 0.3543917752, 0.374301],
+            'Asset Turnover': [np.nan, 0.218942, 0.2350480628, 0.2193767322, 0.184618508, 0.3131453467, 0.4576536271, 0.4448688579, 0.481876],
+            'Financial Leverage': [np.nan, 2.614376, 2.746202553, 2.710082475, 2.625763636, 3.243071637, 3.878294376, 3.345909164, 3.019742],
+            'ROE': [np.nan, -0.213015, 0.1301561219, 0.01059833133, 0.0601458264, 0.200511125, 0.2659057039, 0.1512423166, 0.183448]
+        }
+    }
+
+    # NTPC Data
+    ntpc = {
+        'years': years,
+        'profile': {'name': 'NTPC', 'ticker': 'NTPC', 'sector': 'Power Utilities'},
+        'liquidity': {
+            'Current Ratio': [0.745792, 0.838998, 0.792544, 1.00996, 0.971785, 0.948039, 1.043022, 1.061432, 1.141563],
+            'Quick Ratio': [5.890471, 5.658867, 4.901822, 5.437758, 5.452471, 5.124074, 4.869377, 4.52275, 4.641081],
+            'Cash Ratio': [0.075564, 0.08912, 0.037215, 0.038502, 0.038694, 0.037876, 0.050943, 0.056857, 0.058488]
+        },
+        'solvency': {
+            'Debt-to-Equity Ratio': [1.106307, 1.162138, 1.227501, 1.413444, 1.383761, 1.245198, 1.209937, 1.04259, 0.950124],
+            'Debt Ratio': [0.822895, 0.835513, 0.823012, 0.894435, 0.881241, 0.831458, 0.817577, 0.743255, 0.707817],
+            'Times Interest Earned': [np.nan, 1.450427, 1.281212, 0.597661, 2.064839, 1.184923, 1.388671, 1.477994, 1.473353]
+        },
+        'profitability': {
+            'Gross Profit Margin (%)': [40.04183, 41.75545, 40.10882, 43.25322, 46.03628, 43.67499, 40.07565, 40.90835, 42.19026],
+            'Operating Profit Margin (%)': [np.nan, 22.59512, 23.19172, 21.93669, 23.0196, 24.00593, 23.78656, 22.97917, 22.88617],
+            'Net Profit Margin (%)': [11.82882, 12.13873, 12.74674, 10.06465, 13.29711, 13.42143, 10.25296, 10.91043, 11.26599],
+            'Return on Assets (ROA) (%)': [3.97, 3.98, 4.04, 3.09, 4.01, 4.54, 4.50, 4.60, 4.82],
+            'Return on Equity (ROE) (%)': [3.97, 3.98, 4.04, 3.09, 4.01, 4.54, 4.50, 4.60, 4.82]
+        },
+        'dupont_3': {
+            'Net Profit Margin': [0.118288, 0.121387, 0.127467, 0.100646, 0.132971, 0.134214, 0.10253, 0.109104, 0.11266],
+            'Asset Turnover': [0.0, 0.343047, 0.334546, 0.324886, 0.308703, 0.344101, 0.455226, 0.427255, 0.435374],
+            'Equity Multiplier': [2.458427, 2.556487, 2.708153, 2.885172, 2.884548, 2.768401, 2.753168, 2.623974, 2.52361],
+            'ROE': [0.0, 0.106456, 0.115485, 0.094341, 0.118406, 0.127853, 0.128501, 0.122317, 0.123781]
+        },
+        'dupont_5': {
+            'Tax Burden': [0.77872, 0.838219, 0.1305, 0.524122, 0.877323, 0.787323, 0.735233, 0.732569, 0.72913],
+            'Interest Burden': [12052.16, 12339.46, 8831.18, 19294.76, 15694.91, 20477.81, 23476.0, 24679.42, 26949.1],
+            'Operating Margin': [0.160657, 0.15588, 0.104281, 0.20797, 0.164208, 0.183983, 0.148105, 0.158043, 0.163406],
+            'Asset Turnover': [0.0, 0.343047, 0.334546, 0.324886, 0.308703, 0.344101, 0.455226, 0.427255, 0.435374],
+            'Financial Leverage': [0.0, 2.50883, 2.634361, 2.79913, 2.884853, 2.824343, 2.760475, 2.686112, 2.571899],
+            'ROE': [0.0, 0.04343, 0.046387, 0.038923, 0.053577, 0.05687, 0.049496, 0.049249, 0.050711]
+        }
+    }
+
+    return {
+        'tata_power': tata_power,
+        'ntpc': ntpc,
+        'years': years
+    }
+
+# Ratio categories in store order; ratios of one category are kept contiguous
+RATIO_CATEGORIES = ('liquidity', 'solvency', 'profitability', 'dupont_3', 'dupont_5')
+
+# Raw statement line items the ratio engine works from (see compute_ratios)
+STATEMENT_CATEGORY = 'statement'
+
+LINE_ITEMS = (
+    'revenue', 'cost_of_revenue', 'operating_profit', 'interest_expense',
+    'profit_before_tax', 'net_income', 'current_assets', 'inventories', 'cash',
+    'current_liabilities', 'total_debt', 'total_assets', 'total_equity'
+)
+
+# Income statement items are flows over a period; the rest are balances at its end
+FLOW_ITEMS = LINE_ITEMS[:6]
+
+PANEL_CATEGORIES = RATIO_CATEGORIES + (STATEMENT_CATEGORY,)
+
+# Directory of per-company ratio panels. Each file is an Arrow IPC (.arrow,
+# .feather, .ipc) or Parquet table with a `period` column plus one float column
+# per ratio named "<category>/<ratio>", e.g. "liquidity/Current Ratio", and/or
+# per line item named "statement/<item>", e.g. "statement/revenue". Schema
+# metadata may carry `company` (the key, defaults to the file stem), `name`,
+# `ticker` and `sector`.
+DATA_DIR = os.environ.get(
+    'DASHBOARD_DATA_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+)
+
+PANEL_EXTENSIONS = ('.arrow', '.feather', '.ipc', '.parquet')
+
+PANEL_METADATA_KEYS = ('company', 'name', 'ticker', 'sector')
+
+def scan_panel_files(data_dir=DATA_DIR):
+    """
+    Stat every panel file in `data_dir`. The sorted (path, mtime_ns, size)
+    tuples are the cache key for everything loaded from disk, so touching one
+    file only invalidates that file's read.
+    """
+    try:
+        entries = os.scandir(data_dir)
+    except (FileNotFoundError, NotADirectoryError):
+        return ()
+
+    panel_files = []
+    with entries:
+        for entry in entries:
+            if entry.is_file() and entry.name.lower().endswith(PANEL_EXTENSIONS):
+                stat = entry.stat()
+                panel_files.append((entry.path, stat.st_mtime_ns, stat.st_size))
+    return tuple(sorted(panel_files))
+
+@functools.lru_cache(maxsize=256)
+def panel_columns(names):
+    """(positions, (category, name) keys) of the ratio and line item columns among a panel file's column names"""
+    positions, keys = [], []
+    for i, column in enumerate(names):
+        category, sep, name = column.partition('/')
+        if sep and category in PANEL_CATEGORIES:
+            positions.append(i)
+            keys.append((category, name))
+    return positions, tuple(keys)
+
+def read_panel_file(path, mtime_ns, size):
+    """
+    Read one company's panel through a memory map. Its ratio and line item
+    columns come out of Arrow as one (period, column) float64 block, nulls as
+    NaN, with `columns` holding the (category, name) of each block column;
+    `mtime_ns` and `size` only key a caller's cache.
+    """
+    import pyarrow as pa
+
+    if path.lower().endswith('.parquet'):
+        import pyarrow.parquet as pq
+        table = pq.read_table(path, memory_map=True)
+    else:
+        reader = pa.ipc.open_file(pa.memory_map(path, 'r'))
+        # A single record batch, as write_panel_file() writes, skips assembling a table
+        table = reader.get_batch(0) if reader.num_record_batches == 1 else reader.read_all()
+    if isinstance(table, pa.Table):
+        table = pa.RecordBatch.from_arrays([column.combine_chunks() for column in table.columns], schema=table.schema)
+
+    metadata = {
+        key.decode(): value.decode()
+        for key, value in (table.schema.metadata or {}).items()
+        if key.decode() in PANEL_METADATA_KEYS
+    }
+    company = metadata.pop('company', os.path.splitext(os.path.basename(path))[0])
+
+    positions, columns = panel_columns(tuple(table.schema.names))
+    block = table.select(positions)
+    if not columns:
+        values = np.empty((table.num_rows, 0))
+    else:
+        try:
+            # Numeric columns of any width upcast to one type in a single copy
+            values = block.to_tensor(null_to_nan=True, row_major=False).to_numpy()
+        except (pa.ArrowTypeError, pa.ArrowNotImplementedError):
+            block = pa.RecordBatch.from_arrays(
+                [column.cast(pa.float64()) for column in block.columns], names=block.schema.names
+            )
+            values = block.to_tensor(null_to_nan=True, row_major=False).to_numpy()
+    return {
+        'company': company,
+        'profile': metadata,
+        'years': [str(period) for period in table.column('period').to_pylist()],
+        'columns': columns,
+        'values': values.astype(np.float64, copy=False),
+    }
+
+def panel_files_version(panel_files):
+    """Short digest of scan_panel_files() entries: the data version of everything loaded from them"""
+    return hashlib.sha1(repr(panel_files).encode()).hexdigest()[:12] if panel_files else 'builtin'
+
+class PanelCache:
+    """
+    read_panel_file() results keyed by (path, mtime_ns, size) entry, so a
+    rebuild after touching one file only re-reads that file. retain() drops
+    the entries of files no longer in the latest scan, so the cache never
+    holds more than one panel per file on disk.
+    """
+
+    def __init__(self):
+        self._panels = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._panels)
+
+    def read(self, path, mtime_ns, size):
+        entry = (path, mtime_ns, size)
+        panel = self._panels.get(entry)
+        if panel is None:
+            panel = read_panel_file(path, mtime_ns, size)
+            with self._lock:
+                self._panels[entry] = panel
+        return panel
+
+    def retain(self, panel_files):
+        """Keep only the panels of `panel_files`"""
+        keep = set(panel_files)
+        with self._lock:
+            self._panels = {entry: panel for entry, panel in self._panels.items() if entry in keep}
+
+# Period labels are month-end labels such as 'Mar-25'; the gap between them
+# sets the frequency, anchored on the fiscal year-end month
+PERIOD_LABEL_FORMAT = '%b-%y'
+
+PERIODS_PER_YEAR = {'Y': 1, 'Q': 4, 'M': 12}
+
+PERIOD_FREQUENCIES = {12 // n: freq for freq, n in PERIODS_PER_YEAR.items()}
+
+PERIOD_AXIS_TITLES = {1: 'Fiscal Year', 2: 'Fiscal Half-Year', 4: 'Fiscal Quarter', 12: 'Month'}
+
+# Months per period of each pandas period frequency, by its base name's first letter
+PERIOD_MONTHS = {'Y': 12, 'Q': 3, 'M': 1}
+
+def parse_periods(labels):
+    """
+    Period index of month-end labels, its frequency from the smallest gap
+    between them: annual, quarterly, monthly, or a multiple of months that
+    divides the year (half-yearly '6M', say). Annual periods end in the month
+    of the latest label (the fiscal year-end); quarters are calendar quarters.
+    None if any label does not parse or the gap does not divide the year.
+    """
+    parsed = pd.to_datetime(pd.Index(labels), format=PERIOD_LABEL_FORMAT, errors='coerce')
+    if len(parsed) == 0 or parsed.isna().any():
+        return None
+    months = np.unique(parsed.year * 12 + parsed.month - 1)
+    step = int(np.diff(months).min()) if len(months) > 1 else 12
+    if 12 % step:
+        return None
+    freq = PERIOD_FREQUENCIES.get(step, f'{step}M')
+    if freq == 'Y':
+        freq += '-' + parsed.max().strftime('%b').upper()
+    return pd.PeriodIndex(parsed.to_period(freq), name='Period')
+
+def periods_per_year(index):
+    """Periods per year of a parse_periods() index; labels that did not parse count as annual"""
+    if not isinstance(index, pd.PeriodIndex):
+        return 1
+    return 12 // (PERIOD_MONTHS[index.freq.name[0]] * index.freq.n)
+
+def period_sort_key(periods):
+    """Order period labels chronologically, falling back to first-seen order"""
+    parsed = parse_periods(periods)
+    if parsed is None:
+        return list(periods)
+    return list(pd.Index(periods)[parsed.argsort()])
+
+def load_financial_data(panel_files=(), read_file=read_panel_file):
+    """
+    Load every company's ratios and statement line items in the nested
+    company → category → ratio layout, aligned on the union of periods.
+    `panel_files` comes from scan_panel_files(); without any, the built-in
+    data is returned. `read_file` reads one (path, mtime_ns, size) entry,
+    e.g. a cached read_panel_file.
+    """
+    if not panel_files:
+        return builtin_financial_data()
+
+    panels = [read_file(*entry) for entry in panel_files]
+    years = period_sort_key(dict.fromkeys(year for panel in panels for year in panel['years']))
+    year_pos = {year: i for i, year in enumerate(years)}
+
+    data = {'years': years}
+    for panel in panels:
+        rows = np.fromiter((year_pos[year] for year in panel['years']), dtype=np.intp, count=len(panel['years']))
+        company_data = {'years': years, 'profile': panel['profile']}
+        for (category, name), series in zip(panel['columns'], panel['values'].T):
+            aligned = np.full(len(years), np.nan)
+            aligned[rows] = series
+            company_data.setdefault(category, {})[name] = aligned
+        data[panel['company']] = company_data
+    return data
+
+def write_panel_file(path, company_data, company=None, **profile):
+    """Write one company's nested ratio and statement data as a panel file (Arrow IPC or Parquet by extension)"""
+    import pyarrow as pa
+
+    columns = {'period': pa.array(company_data['years'], type=pa.string())}
+    for category in PANEL_CATEGORIES:
+        for name, series in company_data.get(category, {}).items():
+            columns[f'{category}/{name}'] = pa.array(np.asarray(series, dtype=np.float64))
+
+    metadata = {key: str(value) for key, value in profile.items() if key in PANEL_METADATA_KEYS}
+    if company is not None:
+        metadata['company'] = company
+    table = pa.table(columns).replace_schema_metadata(metadata)
+
+    if path.lower().endswith('.parquet'):
+        import pyarrow.parquet as pq
+        pq.write_table(table, path)
+    else:
+        with pa.OSFile(path, 'wb') as sink, pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+
+# DuPont components stored as plain fractions rather than multiples
+FRACTION_RATIOS = {'Net Profit Margin', 'ROE', 'Tax Burden', 'Operating Margin'}
+
+def ratio_unit(name):
+    """Infer the display unit of a ratio from its name"""
+    if name.endswith('(%)'):
+        return '%'
+    if name in FRACTION_RATIOS:
+        return 'fraction'
+    return 'x'
+
+def safe_divide(numerator, denominator):
+    """Elementwise ratio, NaN wherever the denominator is zero or missing"""
+    out = np.full(np.broadcast(numerator, denominator).shape, np.nan)
+    np.divide(numerator, denominator, out=out, where=denominator != 0)
+    return out
+
+def period_average(series):
+    """Average of opening and closing balances along the period axis; NaN for the first period"""
+    average = np.full_like(series, np.nan)
+    average[:, 1:] = (series[:, 1:] + series[:, :-1]) / 2
+    return average
+
+def percent(fraction):
+    return fraction * 100
+
+def rolling_sum(series, window):
+    """Trailing sum over `window` periods along the period axis; NaN until a full window of values"""
+    filled = np.nan_to_num(series)
+    cumulative = np.cumsum(filled, axis=1)
+    missing = np.cumsum(np.isnan(series), axis=1)
+    total = np.full_like(cumulative, np.nan)
+    total[:, window - 1:] = cumulative[:, window - 1:]
+    total[:, window:] -= cumulative[:, :-window]
+    gaps = missing[:, window - 1:].copy()
+    gaps[:, 1:] -= missing[:, :-window]
+    total[:, window - 1:][gaps > 0] = np.nan
+    return total
+
+def period_change(series, lag):
+    """Change against the value `lag` periods earlier along the period axis; NaN for the first `lag` periods"""
+    change = np.full_like(series, np.nan)
+    change[:, lag:] = series[:, lag:] - series[:, :-lag]
+    return change
+
+# Derived metric graph: node → (inputs, function, lag). Inputs are line items
+# or other nodes, functions take and return (company, period) arrays, and
+# `lag` is how many earlier periods a node reads. Ratio nodes are keyed
+# (category, name); the rest are intermediates.
+METRIC_GRAPH = {
+    'average_assets': (('total_assets',), period_average, 1),
+    'average_equity': (('total_equity',), period_average, 1),
+    'net_margin': (('net_income', 'revenue'), safe_divide, 0),
+    'operating_margin': (('operating_profit', 'revenue'), safe_divide, 0),
+    'asset_turnover': (('revenue', 'average_assets'), safe_divide, 0),
+    'leverage': (('average_assets', 'average_equity'), safe_divide, 0),
+    'tax_burden': (('net_income', 'profit_before_tax'), safe_divide, 0),
+    'interest_burden': (('profit_before_tax', 'operating_profit'), safe_divide, 0),
+    'roe': (('net_margin', 'asset_turnover', 'leverage'), lambda npm, at, em: npm * at * em, 0),
+
+    ('liquidity', 'Current Ratio'): (('current_assets', 'current_liabilities'), safe_divide, 0),
+    ('liquidity', 'Quick Ratio'): (
+        ('current_assets', 'inventories', 'current_liabilities'),
+        lambda assets, inventories, liabilities: safe_divide(assets - inventories, liabilities), 0
+    ),
+    ('liquidity', 'Cash Ratio'): (('cash', 'current_liabilities'), safe_divide, 0),
+    ('solvency', 'Debt-to-Equity Ratio'): (('total_debt', 'total_equity'), safe_divide, 0),
+    ('solvency', 'Debt Ratio'): (('total_debt', 'total_assets'), safe_divide, 0),
+    ('solvency', 'Times Interest Earned'): (('operating_profit', 'interest_expense'), safe_divide, 0),
+    ('profitability', 'Gross Profit Margin (%)'): (
+        ('revenue', 'cost_of_revenue'),
+        lambda revenue, cost: percent(safe_divide(revenue - cost, revenue)), 0
+    ),
+    ('profitability', 'Operating Profit Margin (%)'): (('operating_margin',), percent, 0),
+    ('profitability', 'Net Profit Margin (%)'): (('net_margin',), percent, 0),
+    ('profitability', 'Return on Assets (ROA) (%)'): (
+        ('net_income', 'average_assets'),
+        lambda income, assets: percent(safe_divide(income, assets)), 0
+    ),
+    ('profitability', 'Return on Equity (ROE) (%)'): (('roe',), percent, 0),
+    ('dupont_3', 'Net Profit Margin'): (('net_margin',), np.copy, 0),
+    ('dupont_3', 'Asset Turnover'): (('asset_turnover',), np.copy, 0),
+    ('dupont_3', 'Equity Multiplier'): (('leverage',), np.copy, 0),
+    ('dupont_3', 'ROE'): (('roe',), np.copy, 0),
+    ('dupont_5', 'Tax Burden'): (('tax_burden',), np.copy, 0),
+    ('dupont_5', 'Interest Burden'): (('interest_burden',), np.copy, 0),
+    ('dupont_5', 'Operating Margin'): (('operating_margin',), np.copy, 0),
+    ('dupont_5', 'Asset Turnover'): (('asset_turnover',), np.copy, 0),
+    ('dupont_5', 'Financial Leverage'): (('leverage',), np.copy, 0),
+    ('dupont_5', 'ROE'): (
+        ('tax_burden', 'interest_burden', 'operating_margin', 'asset_turnover', 'leverage'),
+        lambda tb, ib, om, at, fl: tb * ib * om * at * fl, 0
+    ),
+}
+
+# Ratios produced by compute_ratios, in output column order
+ENGINE_RATIOS = tuple(node for node in METRIC_GRAPH if isinstance(node, tuple))
+
+# Derived nodes in dependency order, each node's direct dependents, and the
+# longest chain of lags (how far a changed period can reach forward)
+METRIC_ORDER = tuple(
+    node for node in graphlib.TopologicalSorter(
+        {node: inputs for node, (inputs, _, _) in METRIC_GRAPH.items()}
+    ).static_order()
+    if node in METRIC_GRAPH
+)
+
+METRIC_DEPENDENTS = {
+    name: {node for node, (inputs, _, _) in METRIC_GRAPH.items() if name in inputs}
+    for name in LINE_ITEMS + tuple(METRIC_GRAPH)
+}
+
+@functools.lru_cache(maxsize=None)
+def metric_reach(node):
+    """Total lag along the longest input chain of a node"""
+    if node not in METRIC_GRAPH:
+        return 0
+    inputs, _, lag = METRIC_GRAPH[node]
+    return lag + max(metric_reach(name) for name in inputs)
+
+METRIC_MAX_LAG = max(metric_reach(node) for node in METRIC_GRAPH)
+
+def downstream_metrics(names):
+    """Every derived node that (transitively) reads any of `names`, in dependency order"""
+    stale = set()
+    frontier = list(names)
+    while frontier:
+        for node in METRIC_DEPENDENTS.get(frontier.pop(), ()):
+            if node not in stale:
+                stale.add(node)
+                frontier.append(node)
+    return [node for node in METRIC_ORDER if node in stale]
+
+def evaluate_metrics(known, nodes):
+    """Evaluate `nodes`, plus any derived inputs not in `known`, in dependency order; fills `known` in place"""
+    needed = set()
+    frontier = list(nodes)
+    while frontier:
+        node = frontier.pop()
+        if node in known or node in needed:
+            continue
+        needed.add(node)
+        frontier.extend(METRIC_GRAPH[node][0])
+    for node in METRIC_ORDER:
+        if node in needed:
+            inputs, function, _ = METRIC_GRAPH[node]
+            known[node] = function(*(known[name] for name in inputs))
+    return known
+
+def ttm_items(items, periods_per_year):
+    """
+    (company, period, item) array of LINE_ITEMS with every flow item summed
+    over the trailing twelve months, so sub-annual panels give annualised
+    ratios; balances are left as reported. A copy unless the panel is annual.
+    """
+    if periods_per_year == 1:
+        return items
+    flows = [LINE_ITEMS.index(name) for name in FLOW_ITEMS]
+    ttm = np.array(items, dtype=np.float64)
+    ttm[..., flows] = rolling_sum(ttm[..., flows], periods_per_year)
+    return ttm
+
+def compute_ratios(items, periods_per_year=1):
+    """
+    Compute every ratio in ENGINE_RATIOS from a (company, period, item)
+    array of LINE_ITEMS in one vectorized pass over the panel, returning a
+    (company, period, ratio) array. Return, turnover and leverage ratios use
+    average balances, so their first period is NaN; both DuPont ROEs are the
+    product of their components and so match the profitability ROE.
+    Quarterly and monthly panels are computed on trailing-twelve-month flows.
+    """
+    # Item-major copy so every line item is one contiguous (company, period) block
+    items = np.moveaxis(ttm_items(np.asarray(items, dtype=np.float64), periods_per_year), -1, 0).copy()
+    ratios = evaluate_metrics(dict(zip(LINE_ITEMS, items)), ENGINE_RATIOS)
+    return np.moveaxis(np.stack([ratios[key] for key in ENGINE_RATIOS]), 0, -1)
+
+class RatioStore:
+    """
+    Columnar ratio panel: one float64 array indexed by (company, period, ratio).
+    `ratio_meta` holds the category and unit of every ratio column. Pages read
+    views of `values` through `CompanyView`, never copies.
+    """
+
+    def __init__(self, companies, periods, ratio_meta, values, profiles=None, version='builtin',
+                 statements=None, statement_companies=()):
+        self.version = version
+        self.companies = list(companies)
+        self.profiles = list(profiles) if profiles is not None else [{} for _ in self.companies]
+        self.periods = list(periods)
+        # Labels for display; the period index carries the real frequency
+        # (annual, quarterly or monthly) when the labels parse
+        self.period_labels = pd.Index(self.periods, name='Period')
+        parsed = parse_periods(self.periods)
+        self.period_index = parsed if parsed is not None else self.period_labels
+        self.periods_per_year = periods_per_year(parsed)
+        self.ratio_meta = ratio_meta.reset_index(drop=True)
+        self.values = values
+        # Shared across sessions, so guard against accidental in-place edits
+        self.values.flags.writeable = False
+
+        # Statement line items of the companies whose ratios compute_ratios
+        # derived; restate() edits these, recomputes downstream ratios and bumps `revision`
+        self.statements = statements
+        self.revision = 0
+        self._statement_pos = {key: i for i, key in enumerate(statement_companies)}
+        self._lock = threading.Lock()
+
+        # Validity bitmap and first/last valid period of every (company, ratio)
+        # series, so charts trim leading/trailing gaps with a slice
+        self.valid = np.empty(self.values.shape, dtype=bool)
+        self.first_valid = np.empty((len(self.companies), self.values.shape[-1]), dtype=np.intp)
+        self.last_valid = np.empty_like(self.first_valid)
+        self._index_validity(slice(None))
+        self.valid.flags.writeable = False
+
+        self._company_pos = {key: i for i, key in enumerate(self.companies)}
+        self._ratio_pos = {
+            (category, name): i
+            for i, (category, name) in enumerate(zip(self.ratio_meta['category'], self.ratio_meta['ratio']))
+        }
+        self._category_slices = {}
+        self._category_columns = {}
+        for category, rows in self.ratio_meta.groupby('category', sort=False).indices.items():
+            sl = slice(rows[0], rows[-1] + 1)
+            self._category_slices[category] = sl
+            self._category_columns[category] = pd.Index(self.ratio_meta['ratio'].iloc[sl])
+
+    @classmethod
+    def from_nested(cls, data, version='builtin'):
+        """
+        Build a store from the nested company → category → ratio → list
+        layout, on its own period order (see from_panels)
+        """
+        periods = data['years']
+        panels = []
+        for key in data:
+            if key == 'years':
+                continue
+            columns = tuple((category, name) for category in PANEL_CATEGORIES for name in data[key].get(category, {}))
+            block = np.array([data[key][category][name] for category, name in columns], dtype=np.float64)
+            panels.append({
+                'company': key,
+                'profile': data[key].get('profile', {}),
+                'years': periods,
+                'columns': columns,
+                'values': block.T.reshape(len(periods), len(columns)),
+            })
+        return cls.from_panels(panels, version, periods)
+
+    @classmethod
+    def from_panels(cls, panels, version='builtin', periods=None):
+        """
+        Build a store from read_panel_file() panels, aligned on `periods`
+        (default: the union of theirs, in date order). Each panel's block is
+        copied into the (company, period, ratio) array with one assignment.
+        Companies with statement line items get their ratios from
+        compute_ratios, in one batch, over any ratios supplied directly. A
+        company read twice keeps its position and its last panel.
+        """
+        panels = list({panel['company']: panel for panel in panels}.values())
+        companies = [panel['company'] for panel in panels]
+        if periods is None:
+            periods = period_sort_key(dict.fromkeys(year for panel in panels for year in panel['years']))
+        periods = list(periods)
+        layouts = dict.fromkeys(panel['columns'] for panel in panels)
+        with_statements = {
+            columns for columns in layouts if any(category == STATEMENT_CATEGORY for category, _ in columns)
+        }
+        reporting = [c for c, panel in enumerate(panels) if panel['columns'] in with_statements]
+
+        meta_rows = []
+        for category in RATIO_CATEGORIES:
+            computed = [name for cat, name in ENGINE_RATIOS if cat == category] if reporting else []
+            names = dict.fromkeys(
+                computed + [name for columns in layouts for cat, name in columns if cat == category]
+            )
+            meta_rows.extend((category, name, ratio_unit(name)) for name in names)
+        ratio_meta = pd.DataFrame(meta_rows, columns=['category', 'ratio', 'unit'])
+
+        # Block column → store column maps, once per distinct panel layout
+        ratio_pos = {(category, name): r for r, (category, name, _) in enumerate(meta_rows)}
+        item_pos = {(STATEMENT_CATEGORY, name): i for i, name in enumerate(LINE_ITEMS)}
+        for columns in layouts:
+            ratio_src = [k for k, column in enumerate(columns) if column in ratio_pos]
+            item_src = [k for k, column in enumerate(columns) if column in item_pos]
+            layouts[columns] = (
+                ratio_src, [ratio_pos[columns[k]] for k in ratio_src],
+                item_src, [item_pos[columns[k]] for k in item_src]
+            )
+
+        values = np.full((len(companies), len(periods), len(ratio_meta)), np.nan)
+        items = np.full((len(reporting), len(periods), len(LINE_ITEMS)), np.nan) if reporting else None
+        statement_pos = {c: s for s, c in enumerate(reporting)}
+        period_pos = {period: t for t, period in enumerate(periods)}
+        for c, panel in enumerate(panels):
+            ratio_src, ratio_dst, item_src, item_dst = layouts[panel['columns']]
+            block = panel['values']
+            if panel['years'] == periods:
+                rows = slice(None)
+            else:
+                rows = np.fromiter(
+                    (period_pos[period] for period in panel['years']), dtype=np.intp, count=len(panel['years'])
+                )[:, None]
+            values[c][rows, ratio_dst] = block[:, ratio_src]
+            if c in statement_pos:
+                items[statement_pos[c]][rows, item_dst] = block[:, item_src]
+
+        if reporting:
+            columns = [
+                r for r, (category, name, _) in enumerate(meta_rows)
+                if (category, name) in ENGINE_RATIOS
+            ]
+            computed = compute_ratios(items, periods_per_year(parse_periods(periods)))
+            ratio_order = [ENGINE_RATIOS.index(tuple(meta_rows[r][:2])) for r in columns]
+            values[np.ix_(reporting, np.arange(len(periods)), columns)] = computed[..., ratio_order]
+
+        profiles = [panel['profile'] for panel in panels]
+        return cls(companies, periods, ratio_meta, values, profiles, version,
+                   items, [companies[c] for c in reporting])
+
+    def _index_validity(self, rows):
+        """Refresh the validity bitmap and first/last valid periods of `rows` (a company position or slice)"""
+        valid = self.valid[rows]
+        np.logical_not(np.isnan(self.values[rows]), out=valid)
+        n_periods = len(self.periods)
+        has_valid = valid.any(axis=-2)
+        self.first_valid[rows] = np.where(has_valid, valid.argmax(axis=-2), n_periods)
+        self.last_valid[rows] = np.where(has_valid, n_periods - 1 - valid[..., ::-1, :].argmax(axis=-2), -1)
+
+    def period_position(self, period):
+        """Position of a period given as its label or as a pandas Period"""
+        if isinstance(period, pd.Period):
+            return self.period_index.get_loc(period)
+        return self.period_labels.get_loc(period)
+
+    def period_window(self, start=None, end=None):
+        """
+        Slice of the periods from `start` to `end`, both inclusive and either
+        open-ended. Bounds are period labels or anything pandas reads as a
+        Period (a Period, date or 'YYYY-MM' string) and need not be in the
+        panel: they are found by binary search on the sorted period index.
+        """
+        lo = 0 if start is None else self._period_bound(start, 'left')
+        hi = len(self.periods) if end is None else self._period_bound(end, 'right')
+        return slice(lo, max(lo, hi))
+
+    def _period_bound(self, period, side):
+        if not isinstance(self.period_index, pd.PeriodIndex):
+            # Labels that did not parse have no order beyond their position
+            return self.period_labels.get_loc(period) + (side == 'right')
+        if isinstance(period, str):
+            parsed = pd.to_datetime(period, format=PERIOD_LABEL_FORMAT, errors='coerce')
+            period = period if pd.isna(parsed) else parsed
+        if isinstance(period, pd.Period):
+            period = period.asfreq(self.period_index.freq, how='end')
+        else:
+            period = pd.Period(period, freq=self.period_index.freq)
+        return int(self.period_index.searchsorted(period, side=side))
+
+    def restate(self, company, period, **items):
+        """
+        Overwrite statement line items of one company and period, e.g. a
+        restated filing, and recompute only the ratios downstream of them, for
+        the periods they reach. Returns the (category, name) of every
+        recomputed ratio.
+        """
+        unknown = set(items) - set(LINE_ITEMS)
+        if unknown:
+            raise KeyError(f"Unknown line items: {sorted(unknown)}")
+        s = self._statement_pos[company]
+        c = self._company_pos[company]
+        t = self.period_position(period)
+        # Periods that can read period t, plus the earlier ones they need;
+        # trailing-twelve-month flows widen the reach both ways
+        reach = METRIC_MAX_LAG + self.periods_per_year - 1
+        lo = max(0, t - reach)
+        hi = min(len(self.periods), t + reach + 1)
+        stale = [node for node in downstream_metrics(items) if node in self._ratio_pos]
+
+        with self._lock:
+            for name, value in items.items():
+                self.statements[s, t, LINE_ITEMS.index(name)] = value
+            if not stale:
+                return stale
+            window = ttm_items(self.statements[s:s + 1, lo:hi], self.periods_per_year)
+            known = evaluate_metrics(dict(zip(LINE_ITEMS, np.moveaxis(window, -1, 0))), stale)
+            columns = [self._ratio_pos[node] for node in stale]
+
+            self.values.flags.writeable = True
+            self.valid.flags.writeable = True
+            try:
+                self.values[c][t:hi, columns] = np.stack([known[node][0, t - lo:] for node in stale], axis=-1)
+                self._index_validity(c)
+            finally:
+                self.values.flags.writeable = False
+                self.valid.flags.writeable = False
+            self.revision += 1
+        return stale
+
+    def __contains__(self, company):
+        return company in self._company_pos
+
+    def __getitem__(self, company):
+        return CompanyView(self, self._company_pos[company])
+
+    def view(self, company, window=slice(None)):
+        """CompanyView of one company limited to a period window (see period_window)"""
+        return CompanyView(self, self._company_pos[company], window)
+
+    def ratio_index(self, category, name):
+        """Column position of a ratio in `values`"""
+        return self._ratio_pos[(category, name)]
+
+class CompanyView:
+    """
+    Read-only view of one company's (period, ratio) slice of a RatioStore,
+    optionally limited to a contiguous window of periods
+    """
+
+    def __init__(self, store, pos, window=slice(None)):
+        self.store = store
+        self.pos = pos
+        self.key = store.companies[pos]
+        self.window = slice(*window.indices(len(store.periods))[:2])
+        self.values = store.values[pos, self.window]
+        self.period_labels = store.period_labels[self.window]
+
+    @property
+    def years(self):
+        return self.store.periods[self.window]
+
+    @property
+    def period_range(self):
+        """First and last period label, for chart and section titles"""
+        return f"{self.years[0]} to {self.years[-1]}"
+
+    @property
+    def is_current(self):
+        """Whether the window runs to the store's latest period"""
+        return self.window.stop == len(self.store.periods)
+
+    @property
+    def period_axis(self):
+        return PERIOD_AXIS_TITLES.get(self.store.periods_per_year, 'Period')
+
+    def __getitem__(self, category):
+        return CategoryView(self, category)
+
+    def frame(self, category):
+        """DataFrame over one category, sharing memory with the store"""
+        sl = self.store._category_slices[category]
+        return pd.DataFrame(
+            self.values[:, sl],
+            index=self.period_labels,
+            columns=self.store._category_columns[category],
+            copy=False
+        )
+
+    def valid_span(self, category, *names):
+        """Period slice where every named ratio of a category is between its first and last valid value"""
+        cols = [self.store.ratio_index(category, name) for name in names]
+        first = self.store.first_valid[self.pos, cols].max()
+        last = self.store.last_valid[self.pos, cols].min()
+        # Clip to the window and make window-relative
+        start, stop = self.window.start, self.window.stop
+        first = min(max(first, start), stop) - start
+        last = min(last, stop - 1) - start
+        return slice(first, max(first, last + 1))
+
+    def latest_common(self, category, *names):
+        """Window-relative position of the last period where every named ratio of a category is valid, or None"""
+        span = self.valid_span(category, *names)
+        common = np.logical_and.reduce([~np.isnan(self[category][name][span]) for name in names])
+        positions = np.flatnonzero(common)
+        return span.start + int(positions[-1]) if len(positions) else None
+
+    def trimmed(self, category, name):
+        """(periods, values) views of a ratio with leading and trailing NaNs cut off"""
+        span = self.valid_span(category, name)
+        return self.period_labels[span], self[category][name][span]
+
+class CategoryView(Mapping):
+    """Ratio name → 1-D array view mapping for one company and category"""
+
+    def __init__(self, company_view, category):
+        self._values = company_view.values
+        sl = company_view.store._category_slices.get(category, slice(0, 0))
+        names = company_view.store.ratio_meta['ratio'].iloc[sl]
+        self._pos = dict(zip(names, range(sl.start, sl.stop)))
+
+    def __getitem__(self, name):
+        return self._values[:, self._pos[name]]
+
+    def __iter__(self):
+        return iter(self._pos)
+
+    def __len__(self):
+        return len(self._pos)
+
+# Sectors dealt round-robin to synthetic companies
+SYNTHETIC_SECTORS = ('Power Generation', 'Transmission', 'Renewables', 'Utilities', 'Coal & Mining')
+
+# Companies drawn per vectorized block. Each block has its own seed, so
+# changing this changes the generated data
+SYNTHETIC_BLOCK = 256
+
+def synthetic_period_labels(n_periods, frequency='Q', end='Mar-25'):
+    """
+    `n_periods` consecutive period labels ending with `end`, `frequency` one
+    of 'Y', 'Q' or 'M'. Two-digit years only reach from 1969 to 2068.
+    """
+    step = 12 // PERIODS_PER_YEAR[frequency]
+    last = pd.Period(pd.to_datetime(end, format=PERIOD_LABEL_FORMAT), 'M')
+    first = last - step * (n_periods - 1)
+    if first.year < 1969:
+        raise ValueError(f"{n_periods} periods ending {end} reach back before 1969")
+    return [(first + step * k).strftime(PERIOD_LABEL_FORMAT) for k in range(n_periods)]
+
+def synthetic_statements(rng, n_companies, n_periods, periods_per_year=4):
+    """
+    (company, period, item) array of LINE_ITEMS for `n_companies` synthetic
+    companies: revenue on a random walk, margins, turnover and leverage drawn
+    per company around typical levels, and some companies listed mid-panel.
+    """
+    shape = (n_companies, n_periods)
+    level = lambda low, high: rng.uniform(low, high, (n_companies, 1))
+    wobble = lambda scale: np.exp(rng.normal(0, scale, shape))
+
+    growth = rng.normal(0.06, 0.12 * np.sqrt(periods_per_year), shape) / periods_per_year
+    revenue = np.exp(rng.normal(8, 1.5, (n_companies, 1)) + growth.cumsum(axis=1)) / periods_per_year
+    total_assets = revenue * periods_per_year * level(1.5, 6) * wobble(0.03)
+    total_equity = total_assets * level(0.2, 0.6) * wobble(0.03)
+    total_debt = (total_assets - total_equity) * level(0.3, 0.8)
+    current_assets = total_assets * level(0.08, 0.4) * wobble(0.05)
+    operating_margin = np.clip(rng.normal(0.18, 0.07, (n_companies, 1)) + rng.normal(0, 0.04, shape), -0.3, 0.6)
+    operating_profit = revenue * operating_margin
+    interest_expense = total_debt * level(0.02, 0.06) * wobble(0.1) / periods_per_year
+    profit_before_tax = operating_profit - interest_expense
+    tax_burden = np.where(profit_before_tax > 0, level(0.65, 0.8), 1.0)
+
+    items = dict(
+        revenue=revenue,
+        cost_of_revenue=revenue * level(0.45, 0.8) * wobble(0.03),
+        operating_profit=operating_profit,
+        interest_expense=interest_expense,
+        profit_before_tax=profit_before_tax,
+        net_income=profit_before_tax * tax_burden,
+        current_assets=current_assets,
+        inventories=current_assets * level(0.05, 0.4) * wobble(0.05),
+        cash=current_assets * level(0.05, 0.3) * wobble(0.2),
+        current_liabilities=current_assets / level(0.6, 2.0) * wobble(0.05),
+        total_debt=total_debt,
+        total_assets=total_assets,
+        total_equity=total_equity,
+    )
+    statements = np.stack([items[name] for name in LINE_ITEMS], axis=-1)
+
+    # About one company in six has no history before its listing
+    listed = np.where(rng.random(n_companies) < 1 / 6, rng.integers(0, n_periods, n_companies), 0)
+    statements[np.arange(n_periods) < listed[:, None]] = np.nan
+    return statements
+
+def iter_synthetic_panels(n_companies, n_periods=40, frequency='Q', seed=0, gap_rate=0.01, statements=False):
+    """
+    Yield (company key, company data) for `n_companies` synthetic companies
+    in the nested layout of load_financial_data, one block of SYNTHETIC_BLOCK
+    companies in memory at a time. Ratios of every category come from the
+    ratio engine, so DuPont identities hold. About `gap_rate` of the values
+    are missing, and each ratio's latest period is missing with the same
+    probability (a late filing). With `statements`, the line items are
+    included too. The output is a pure function of the arguments.
+    """
+    labels = synthetic_period_labels(n_periods, frequency)
+    per_year = PERIODS_PER_YEAR[frequency]
+    width = len(str(max(n_companies - 1, 0)))
+    for start in range(0, n_companies, SYNTHETIC_BLOCK):
+        rng = np.random.default_rng([seed, start // SYNTHETIC_BLOCK])
+        n_block = min(SYNTHETIC_BLOCK, n_companies - start)
+        items = synthetic_statements(rng, n_block, n_periods, per_year)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            ratios = compute_ratios(items, per_year)
+        gaps = rng.random(ratios.shape) < gap_rate
+        gaps[:, -1] |= rng.random((n_block, ratios.shape[-1])) < gap_rate
+        ratios[gaps] = np.nan
+
+        for b in range(n_block):
+            number = f"{start + b:0{width}d}"
+            company_data = {
+                'years': labels,
+                'profile': {
+                    'name': f"Synthetic Company {number}",
+                    'ticker': f"SYN{number}",
+                    'sector': SYNTHETIC_SECTORS[(start + b) % len(SYNTHETIC_SECTORS)],
+                },
+            }
+            for r, (category, name) in enumerate(ENGINE_RATIOS):
+                company_data.setdefault(category, {})[name] = ratios[b, :, r]
+            if statements:
+                company_data[STATEMENT_CATEGORY] = dict(zip(LINE_ITEMS, items[b].T))
+            yield f"synthetic_{number}", company_data
+
+def synthetic_financial_data(n_companies, n_periods=40, frequency='Q', seed=0, gap_rate=0.01):
+    """Synthetic universe in memory, in the layout load_financial_data returns"""
+    data = {'years': synthetic_period_labels(n_periods, frequency)}
+    data.update(iter_synthetic_panels(n_companies, n_periods, frequency, seed, gap_rate))
+    return data
+
+def write_synthetic_panels(directory, n_companies, n_periods=40, frequency='Q', seed=0, gap_rate=0.01,
+                           statements=False, extension='.arrow'):
+    """
+    Write a synthetic universe to `directory` as one panel file per company,
+    as it is generated, so panels of any size never have to fit in memory.
+    Returns the number of files written.
+    """
+    os.makedirs(directory, exist_ok=True)
+    written = 0
+    for key, company_data in iter_synthetic_panels(n_companies, n_periods, frequency, seed, gap_rate, statements):
+        write_panel_file(os.path.join(directory, key + extension), company_data, key, **company_data['profile'])
+        written += 1
+    return written
+
+def build_ratio_store(panel_files=(), read_file=read_panel_file, version=None):
+    """
+    Columnar ratio store of `panel_files` (the built-in data without any),
+    versioned by panel_files_version() unless the caller already has it
+    """
+    version = panel_files_version(panel_files) if version is None else version
+    if not panel_files:
+        return RatioStore.from_nested(builtin_financial_data(), version)
+    return RatioStore.from_panels([read_file(*entry) for entry in panel_files], version)
+
+def company_sector(profile):
+    """Sector of a company profile, 'Unclassified' when it has none"""
+    return profile.get('sector') or 'Unclassified'
+
+class CompanyRegistry:
+    """
+    Name/ticker/sector index over the companies of a RatioStore. Exact
+    lookups are dict hits and search bisects a sorted list of name words and
+    tickers, so the selector never scans the whole universe.
+    """
+
+    def __init__(self, keys, names, tickers, sectors):
+        self.keys = list(keys)
+        self.names = list(names)
+        self.tickers = list(tickers)
+        self.sectors = list(sectors)
+
+        self._lookup = {}
+        for pos, terms in enumerate(zip(self.keys, self.names, self.tickers)):
+            for term in terms:
+                if term:
+                    self._lookup.setdefault(term.casefold(), pos)
+
+        self._by_sector = {}
+        for pos, sector in enumerate(self.sectors):
+            self._by_sector.setdefault(sector, []).append(pos)
+        self.sector_names = sorted(self._by_sector)
+
+        # Every word of the name plus the full name and ticker is a search prefix
+        terms = sorted(
+            (term, pos)
+            for pos, (name, ticker) in enumerate(zip(self.names, self.tickers))
+            for term in set(name.casefold().split()) | {name.casefold(), ticker.casefold()}
+            if term
+        )
+        self._terms = [term for term, _ in terms]
+        self._term_pos = [pos for _, pos in terms]
+
+    @classmethod
+    def from_store(cls, store):
+        """Build the registry from the profiles carried by a RatioStore"""
+        profiles = store.profiles
+        return cls(
+            store.companies,
+            [profile.get('name') or key.replace('_', ' ').title() for key, profile in zip(store.companies, profiles)],
+            [profile.get('ticker', '') for profile in profiles],
+            [company_sector(profile) for profile in profiles]
+        )
+
+    def __len__(self):
+        return len(self.keys)
+
+    def lookup(self, text):
+        """Position of the company whose key, name or ticker is `text`, or None"""
+        return self._lookup.get(text.strip().casefold())
+
+    def label(self, pos):
+        """Selector label for a company position"""
+        ticker = self.tickers[pos]
+        return f"{self.names[pos]} ({ticker})" if ticker else self.names[pos]
+
+    def search(self, query='', sector=None, limit=200):
+        """
+        Positions of up to `limit` companies whose ticker or a name word starts
+        with `query`, optionally restricted to one sector. An exact key, name
+        or ticker match comes first.
+        """
+        query = query.strip().casefold()
+        if not query:
+            if sector:
+                return self._by_sector.get(sector, [])[:limit]
+            return list(range(min(limit, len(self.keys))))
+
+        matches = {}
+        exact = self.lookup(query)
+        if exact is not None and (not sector or self.sectors[exact] == sector):
+            matches[exact] = None
+
+        start = bisect.bisect_left(self._terms, query)
+        for i in range(start, len(self._terms)):
+            if len(matches) >= limit or not self._terms[i].startswith(query):
+                break
+            pos = self._term_pos[i]
+            if not sector or self.sectors[pos] == sector:
+                matches[pos] = None
+        return list(matches)
+
+def latest_value(series):
+    """Last non-NaN value of a series, or NaN when it has none"""
+    valid = np.flatnonzero(~np.isnan(series))
+    return series[valid[-1]] if len(valid) else np.nan
+
+def peak_reduction(series):
+    """Percentage fall of the latest value from the series peak"""
+    peak = np.nanmax(series)
+    return (peak - latest_value(series)) / peak * 100 if peak > 0 else np.nan
+
+def trend_label(series):
+    """Arrow label for the move between the last two valid values of a series"""
+    valid = series[~np.isnan(series)]
+    if len(valid) < 2 or valid[-1] == valid[-2]:
+        return "→ Flat"
+    return "↑ Rising" if valid[-1] > valid[-2] else "↓ Falling"
+
+def ratio_snapshot(data, company, category):
+    """Data-generated snapshot bullets for companies without analyst notes"""
+    latest_period = data.years[-1]
+    lines = [f"**{company} {category.title()} Snapshot ({latest_period}):**"]
+    for name, series in data[category].items():
+        valid = np.flatnonzero(~np.isnan(series))
+        if len(valid) == 0:
+            lines.append(f"- **{name}:** No data available.")
+            continue
+        latest = series[valid[-1]]
+        line = f"- **{name} ({latest:.2f}):** "
+        if len(valid) > 1:
+            previous = series[valid[-2]]
+            direction = "up" if latest > previous else "down" if latest < previous else "unchanged"
+            line += f"{direction} from {previous:.2f} in {data.years[valid[-2]]}; "
+        low, high = np.nanmin(series), np.nanmax(series)
+        line += f"range {low:.2f} to {high:.2f} over {data.years[valid[0]]} to {data.years[valid[-1]]}."
+        lines.append(line)
+    return "\n".join(lines)
+
+# Health score model: dimension → (weight, ratios), each ratio given as
+# (category, name, worst, best, weight, window). A ratio scores 0 at `worst`
+# and 10 at `best`, linearly in between and clipped, so lower-is-better
+# ratios simply have worst > best. With a `window` the score is taken on the
+# ratio's trailing standard deviation over that many periods instead of its
+# level. Missing ratios drop out of the weighted means.
+HEALTH_MODEL = {
+    'Liquidity': (1.0, (
+        ('liquidity', 'Current Ratio', 0.5, 2.0, 0.5, None),
+        ('liquidity', 'Quick Ratio', 0.3, 1.5, 0.3, None),
+        ('liquidity', 'Cash Ratio', 0.0, 0.5, 0.2, None),
+    )),
+    'Solvency': (1.0, (
+        ('solvency', 'Debt-to-Equity Ratio', 3.0, 0.5, 0.4, None),
+        ('solvency', 'Debt Ratio', 0.9, 0.3, 0.2, None),
+        ('solvency', 'Times Interest Earned', 1.0, 5.0, 0.4, None),
+    )),
+    'Profitability': (1.0, (
+        ('profitability', 'Net Profit Margin (%)', 0.0, 20.0, 0.3, None),
+        ('profitability', 'Operating Profit Margin (%)', 0.0, 40.0, 0.3, None),
+        ('profitability', 'Return on Equity (ROE) (%)', 0.0, 20.0, 0.4, None),
+    )),
+    'Efficiency': (1.0, (
+        ('dupont_3', 'Asset Turnover', 0.1, 1.0, 1.0, None),
+    )),
+    'Stability': (1.0, (
+        ('profitability', 'Net Profit Margin (%)', 15.0, 0.0, 0.5, 5),
+        ('solvency', 'Debt-to-Equity Ratio', 1.0, 0.0, 0.5, 5),
+    )),
+}
+
+# Every ratio the health model reads
+HEALTH_RATIOS = {
+    (category, name)
+    for _, ratios in HEALTH_MODEL.values()
+    for category, name, *_ in ratios
+}
+
+def trailing_std(series, window):
+    """Standard deviation over the trailing `window` periods of a (company, period) array"""
+    out = np.full_like(series, np.nan)
+    if series.shape[1] >= window:
+        windows = np.lib.stride_tricks.sliding_window_view(series, window, axis=1)
+        with warnings.catch_warnings():
+            # All-NaN windows just stay NaN
+            warnings.simplefilter('ignore', RuntimeWarning)
+            out[:, window - 1:] = np.nanstd(windows, axis=-1)
+    return out
+
+def weighted_nanmean(scores, weights):
+    """Weighted mean over the last axis, skipping NaNs; NaN where nothing is valid"""
+    valid = ~np.isnan(scores)
+    total = np.where(valid, scores, 0.0) @ weights
+    return safe_divide(total, valid @ weights)
+
+class HealthScores:
+    """
+    Health scores (0-10) of every company and period under a health model:
+    `ratio_scores` (company, period, model ratio), `dimensions` (company,
+    period, dimension) and `overall` (company, period).
+    """
+
+    def __init__(self, store, ratio_keys, ratio_scores, dimension_names, dimensions, overall):
+        self.periods = store.periods
+        self.ratio_keys = ratio_keys
+        self.ratio_scores = ratio_scores
+        self.dimension_names = dimension_names
+        self.dimensions = dimensions
+        self.overall = overall
+        self._company_pos = store._company_pos
+        self._ratio_pos = {key: k for k, key in enumerate(ratio_keys)}
+
+    # Every method takes an optional period `window` slice (see
+    # CompanyView.window); positions it returns are relative to the window
+
+    def latest_index(self, company, window=slice(None)):
+        """Position of the latest period with an overall score, or None"""
+        valid = np.flatnonzero(~np.isnan(self.history(company, window)))
+        return valid[-1] if len(valid) else None
+
+    def history(self, company, window=slice(None)):
+        """Overall score of every period for one company"""
+        return self.overall[self._company_pos[company], window]
+
+    def latest_dimensions(self, company, names=None, window=slice(None)):
+        """Dimension name → score at the latest scored period"""
+        t = self.latest_index(company, window)
+        names = self.dimension_names if names is None else names
+        if t is None:
+            return {name: np.nan for name in names}
+        row = self.dimensions[self._company_pos[company], window][t]
+        return {name: row[self.dimension_names.index(name)] for name in names}
+
+    def latest_ratio_score(self, company, category, name, window=slice(None)):
+        """Score of one ratio's level at the latest scored period, NaN if the model does not use it"""
+        k = self._ratio_pos.get((category, name, None))
+        t = self.latest_index(company, window)
+        if k is None or t is None:
+            return np.nan
+        return self.ratio_scores[self._company_pos[company], window][t, k]
+
+def score_health(store, model=HEALTH_MODEL):
+    """Score every company and period of a RatioStore under `model` in one vectorized pass"""
+    n_companies, n_periods, _ = store.values.shape
+    n_ratios = sum(len(ratios) for _, ratios in model.values())
+    ratio_scores = np.full((n_companies, n_periods, n_ratios), np.nan)
+    ratio_keys = []
+    ratio_weights = []
+    dimension_weights = []
+    members = []
+    for weight, ratios in model.values():
+        dimension_weights.append(weight)
+        members.append(slice(len(ratio_keys), len(ratio_keys) + len(ratios)))
+        for category, name, worst, best, ratio_weight, window in ratios:
+            k = len(ratio_keys)
+            ratio_keys.append((category, name, window))
+            ratio_weights.append(ratio_weight)
+            if (category, name) not in store._ratio_pos:
+                continue
+            series = store.values[:, :, store.ratio_index(category, name)]
+            if window:
+                series = trailing_std(series, window)
+            ratio_scores[..., k] = np.clip((series - worst) / (best - worst) * 10, 0, 10)
+
+    ratio_weights = np.asarray(ratio_weights)
+    dimensions = np.stack([
+        weighted_nanmean(ratio_scores[..., rows], ratio_weights[rows]) for rows in members
+    ], axis=-1)
+    overall = weighted_nanmean(dimensions, np.asarray(dimension_weights))
+    return HealthScores(store, ratio_keys, ratio_scores, list(model), dimensions, overall)
+
+def health_label(scores, company, window=slice(None)):
+    """Band and direction of a company's latest overall score, e.g. "MODERATE - Improving Trend" """
+    history = scores.history(company, window)
+    valid = history[~np.isnan(history)]
+    if not len(valid):
+        return "Not enough data"
+    score = valid[-1]
+    band = "STRONG" if score >= 7.5 else "MODERATE" if score >= 5 else "WEAK"
+    if len(valid) < 2 or abs(valid[-1] - valid[-2]) < 0.1:
+        return f"{band} - Stable Performance"
+    return f"{band} - {'Improving' if valid[-1] > valid[-2] else 'Declining'} Trend"
+
+def score_color(score):
+    """Gauge bar color for a 0-10 score, matching SCORE_STEPS bands"""
+    if score >= 8:
+        return "green"
+    if score >= 6:
+        return "yellow"
+    if score >= 3:
+        return "orange"
+    return "red"
+
+# Health dimensions shown as risk areas on the executive summary
+RISK_DIMENSIONS = ('Liquidity', 'Solvency', 'Profitability', 'Stability')
+
+def risk_level(risk):
+    """Label for a 0-10 risk score"""
+    if risk >= 7:
+        return "High"
+    if risk >= 5:
+        return "Medium-High"
+    if risk >= 3:
+        return "Medium"
+    return "Low"
+
+class SectorIndex:
+    """
+    Sector standing of every ratio, built once per data version: per
+    (sector, period, ratio) quartiles, mean, standard deviation and count,
+    and per (company, period, ratio) percentile within the sector (0 =
+    lowest value, 100 = highest, ties sharing their average rank) and
+    z-score. Lookups are array indexing.
+    """
+
+    def __init__(self, store):
+        sectors = [company_sector(profile) for profile in store.profiles]
+        self.sector_names = sorted(set(sectors))
+        sector_pos = {name: s for s, name in enumerate(self.sector_names)}
+        self.company_sector = np.array([sector_pos[name] for name in sectors], dtype=np.intp)
+
+        _, n_periods, n_ratios = store.values.shape
+        stats_shape = (len(self.sector_names), n_periods, n_ratios)
+        self.quartiles = np.full((3,) + stats_shape, np.nan)
+        self.mean = np.full(stats_shape, np.nan)
+        self.std = np.full(stats_shape, np.nan)
+        self.count = np.zeros(stats_shape, dtype=np.intp)
+        # float32 halves the footprint of the two universe-sized arrays
+        self.percentiles = np.full(store.values.shape, np.nan, dtype=np.float32)
+        self.zscores = np.full(store.values.shape, np.nan, dtype=np.float32)
+
+        for s in range(len(self.sector_names)):
+            rows = np.flatnonzero(self.company_sector == s)
+            block = store.values[rows]
+            count = store.valid[rows].sum(axis=0)
+            with warnings.catch_warnings():
+                # Periods where no company in the sector reports a ratio stay NaN
+                warnings.simplefilter('ignore', RuntimeWarning)
+                mean = np.nanmean(block, axis=0)
+                std = np.nanstd(block, axis=0)
+            self.mean[s], self.std[s], self.count[s] = mean, std, count
+
+            # One sort serves both quartiles and ranks, done on a (period,
+            # ratio, company) copy so each sorted run is contiguous. NaNs sort
+            # last, so the valid values of a run are its first `count` entries
+            runs = np.moveaxis(block, 0, -1).copy()
+            order = np.argsort(runs, axis=-1)
+            ordered = np.take_along_axis(runs, order, axis=-1)
+            last = np.maximum(count - 1, 0)
+            for q, fraction in enumerate((0.25, 0.5, 0.75)):
+                position = last * fraction
+                below = np.floor(position).astype(np.intp)
+                low = np.take_along_axis(ordered, below[..., None], axis=-1)[..., 0]
+                high = np.take_along_axis(ordered, np.minimum(below + 1, last)[..., None], axis=-1)[..., 0]
+                self.quartiles[q, s] = np.where(count > 0, low + (high - low) * (position - below), np.nan)
+
+            # Tied values share the average of their positions in the sorted
+            # run: the midpoint of the first and last position of each tie
+            positions = np.broadcast_to(np.arange(len(rows)), runs.shape)
+            starts = np.ones(runs.shape, dtype=bool)
+            starts[..., 1:] = ordered[..., 1:] != ordered[..., :-1]
+            ends = np.ones(runs.shape, dtype=bool)
+            ends[..., :-1] = starts[..., 1:]
+            first = np.maximum.accumulate(np.where(starts, positions, 0), axis=-1)
+            last_tied = np.minimum.accumulate(
+                np.where(ends, positions, len(rows) - 1)[..., ::-1], axis=-1
+            )[..., ::-1]
+            ranks = np.empty(runs.shape)
+            np.put_along_axis(ranks, order, (first + last_tied) / 2, axis=-1)
+            percentiles = safe_divide(np.moveaxis(ranks, -1, 0), count - 1) * 100
+            percentiles[np.isnan(block)] = np.nan
+            self.percentiles[rows] = percentiles
+            self.zscores[rows] = safe_divide(block - mean, std)
+
+    def standing(self, store, company_pos, category, name):
+        """Latest valid value of a ratio with the company's sector standing at that period, or None"""
+        r = store.ratio_index(category, name)
+        t = store.last_valid[company_pos, r]
+        if t < 0:
+            return None
+        s = self.company_sector[company_pos]
+        return {
+            'period': store.periods[t],
+            'value': store.values[company_pos, t, r],
+            'q25': self.quartiles[0, s, t, r],
+            'median': self.quartiles[1, s, t, r],
+            'q75': self.quartiles[2, s, t, r],
+            'count': self.count[s, t, r],
+            'percentile': float(self.percentiles[company_pos, t, r]),
+            'zscore': float(self.zscores[company_pos, t, r]),
+        }
+
+# Gauge colour bands as (low, high, color), for 0-10 scores and 1-10 ratings
+SCORE_STEPS = ((0, 3, 'red'), (3, 6, 'orange'), (6, 8, 'yellow'), (8, 10, 'green'))
+
+RATING_STEPS = ((1, 3, 'red'), (3, 5, 'orange'), (5, 7, 'yellow'), (7, 10, 'green'))
+
+# Distinct gauge specs kept in memory; a spec is a few KB of JSON
+GAUGE_CACHE_SIZE = 1024
+
+@functools.lru_cache(maxsize=GAUGE_CACHE_SIZE)
+def gauge_figure_json(title, value, axis_range, steps, reference=None, threshold=None,
+                      bar_color="darkblue", threshold_color="black", height=None,
+                      ticks=None, tick_labels=None):
+    """
+    Serialized gauge indicator, memoized on its value, reference, range and
+    step bands. `steps` is a tuple of (low, high, color) bands; the delta is
+    shown only when a `reference` is given.
+    """
+    axis = {'range': list(axis_range), 'tickwidth': 1}
+    if ticks is not None:
+        axis.update(tickvals=list(ticks), ticktext=list(tick_labels))
+
+    gauge = {
+        'axis': axis,
+        'bar': {'color': bar_color},
+        'steps': [{'range': [low, high], 'color': color} for low, high, color in steps]
+    }
+    if threshold is not None:
+        gauge['threshold'] = {
+            'line': {'color': threshold_color, 'width': 3},
+            'thickness': 0.75,
+            'value': threshold
+        }
+
+    indicator = go.Indicator(
+        mode="gauge+number+delta" if reference is not None else "gauge+number",
+        value=value,
+        domain={'x': [0, 1], 'y': [0, 1]},
+        title={'text': title},
+        delta={'reference': reference} if reference is not None else None,
+        gauge=gauge
+    )
+    fig = go.Figure(indicator)
+    if height is not None:
+        fig.update_layout(height=height)
+    return fig.to_json()
+
+def table_figure(frame):
+    """Static Plotly table of a DataFrame, named index included, for exported reports"""
+    if frame.index.name:
+        frame = frame.reset_index()
+    frame = frame.round(4)
+    return go.Figure(go.Table(
+        header=dict(values=[str(column) for column in frame.columns], fill_color='#1f77b4', font=dict(color='white')),
+        cells=dict(values=[frame[column].tolist() for column in frame.columns])
+    ))
+
+# Upper bound on the JSON held by the shared figure cache (characters, ~bytes)
+FIGURE_CACHE_BYTES = 64 * 1024 * 1024
+
+class FigureCache:
+    """
+    LRU of serialized figure specs keyed by (company, page, figure id, data
+    version) and bounded by total JSON size. One instance is shared by every
+    session, so each figure is built once per data version, not per view;
+    callers asking for a figure that is being built wait for that build.
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._version = None
+        self._entries = OrderedDict()
+        self._building = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get_or_build(self, key, build, *args):
+        """Cached spec for `key`, calling build(*args) on a miss or waiting for a build under way"""
+        with self._lock:
+            spec = self._entries.get(key)
+            if spec is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return spec
+            building = self._building.get(key)
+            if building is not None:
+                self.hits += 1
+            else:
+                self.misses += 1
+                self._building[key] = concurrent.futures.Future()
+        if building is not None:
+            return building.result()
+
+        # Build outside the lock so one slow figure does not stall other sessions
+        try:
+            spec = build(*args)
+        except BaseException as error:
+            with self._lock:
+                self._building.pop(key).set_exception(error)
+            raise
+        self.put(key, spec)
+        with self._lock:
+            self._building.pop(key).set_result(spec)
+        return spec
+
+    def put(self, key, spec):
+        """Insert a spec, evicting least recently used entries past `max_bytes`"""
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.nbytes -= len(previous)
+            if len(spec) > self.max_bytes:
+                return
+            self._entries[key] = spec
+            self.nbytes += len(spec)
+            while self.nbytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.nbytes -= len(evicted)
+
+    def invalidate(self, predicate):
+        """Drop every entry whose key satisfies `predicate`"""
+        with self._lock:
+            for key in [key for key in self._entries if predicate(key)]:
+                self.nbytes -= len(self._entries.pop(key))
+
+    def retain_version(self, version):
+        """Drop entries built from any data version other than `version`"""
+        if version != self._version:
+            self.invalidate(lambda key: key[-1] != version)
+            self._version = version
+
+# Histogram buckets of render timings (seconds) and figure payloads (bytes)
+SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BYTES_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+class MetricsRegistry:
+    """
+    In-process histograms of hot-path timings and sizes, labelled by page,
+    section or figure. Thread safe, so one registry serves every session of
+    the app; read it back with summary() or as Prometheus text.
+    """
+
+    def __init__(self):
+        self._metrics = {}
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def define(self, name, help_text, buckets=SECONDS_BUCKETS):
+        """Declare a histogram; observations of undeclared names are rejected"""
+        with self._lock:
+            self._metrics[name] = (help_text, tuple(buckets))
+
+    def observe(self, name, value, **labels):
+        """Record one observation of `name` under `labels`"""
+        _, buckets = self._metrics[name]
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = {'counts': [0] * (len(buckets) + 1), 'sum': 0.0, 'max': 0.0}
+            series['counts'][bisect.bisect_left(buckets, value)] += 1
+            series['sum'] += value
+            series['max'] = max(series['max'], value)
+
+    @contextlib.contextmanager
+    def timer(self, name, **labels):
+        """Observe the wall time of the `with` block, even when it raises"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def _snapshot(self):
+        with self._lock:
+            return sorted(
+                (key, {'counts': list(series['counts']), 'sum': series['sum'], 'max': series['max']})
+                for key, series in self._series.items()
+            )
+
+    def summary(self):
+        """One row per labelled series: count, total, mean, p95 (bucket upper bound) and max"""
+        rows = []
+        for (name, labels), series in self._snapshot():
+            buckets = self._metrics[name][1]
+            count = sum(series['counts'])
+            cumulative = np.cumsum(series['counts'])
+            p95_bucket = int(np.searchsorted(cumulative, 0.95 * count))
+            rows.append({
+                'metric': name,
+                **dict(labels),
+                'count': count,
+                'total': series['sum'],
+                'mean': series['sum'] / count,
+                'p95': buckets[p95_bucket] if p95_bucket < len(buckets) else series['max'],
+                'max': series['max'],
+            })
+        return rows
+
+    def to_prometheus(self):
+        """The registry in the Prometheus text exposition format"""
+        by_name = {}
+        for (name, labels), series in self._snapshot():
+            by_name.setdefault(name, []).append((labels, series))
+
+        lines = []
+        for name, (help_text, buckets) in sorted(self._metrics.items()):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} histogram")
+            for labels, series in by_name.get(name, ()):
+                cumulative = np.cumsum(series['counts'])
+                for bound, count in zip((*map(repr, buckets), '+Inf'), cumulative):
+                    lines.append(f"{name}_bucket{_prometheus_labels(labels + (('le', bound),))} {count}")
+                lines.append(f"{name}_sum{_prometheus_labels(labels)} {series['sum']!r}")
+                lines.append(f"{name}_count{_prometheus_labels(labels)} {cumulative[-1]}")
+        return "\n".join(lines) + "\n"
+
+def _prometheus_labels(labels):
+    if not labels:
+        return ""
+    escape = lambda value: str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    return "{" + ",".join(f'{key}="{escape(value)}"' for key, value in labels) + "}"
+
+def serve_metrics(registry, port, host=""):
+    """Serve `registry` as Prometheus text on http://host:port/metrics from a daemon thread"""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?')[0] != '/metrics':
+                self.send_error(404)
+                return
+            body = registry.to_prometheus().encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, name='metrics-server', daemon=True).start()
+    return server
+
+def table_views(periods_per_year):
+    """Table views → lag in periods: values as reported, then year- and quarter-over-quarter changes the panel supports"""
+    views = {"Values": 0, "YoY change": periods_per_year}
+    if periods_per_year >= 4:
+        views["QoQ change"] = periods_per_year // 4
+    return views
+
+# Bulk ratio downloads: (company, period) rows with one `<category>/<ratio>`
+# column per ratio, as in panel files, written chunk by chunk to a spooled
+# temporary file that moves to disk past DOWNLOAD_SPOOL_BYTES. Streamlit
+# reads the finished file into memory to serve it, so a download is capped
+# at DOWNLOAD_MAX_CELLS ratio values (roughly 100 MB of CSV)
+DOWNLOAD_CHUNK_ROWS = 50_000
+
+DOWNLOAD_SPOOL_BYTES = 16 * 1024 * 1024
+
+DOWNLOAD_MAX_CELLS = 10_000_000
+
+EXCEL_MAX_ROWS = 1_048_576
+
+DOWNLOAD_FORMATS = {
+    'CSV': ('csv', 'text/csv'),
+    'Excel': ('xlsx', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'),
+    'Parquet': ('parquet', 'application/vnd.apache.parquet'),
+}
+
+def iter_panel_chunks(store, positions, window=slice(None), columns=None, chunk_rows=DOWNLOAD_CHUNK_ROWS):
+    """
+    Yield the (company, period) × ratio panel of the companies at `positions`
+    as DataFrames of at most about `chunk_rows` rows, in company order. Only
+    one chunk is ever copied out of the store.
+    """
+    columns = np.arange(len(store.ratio_meta)) if columns is None else np.asarray(columns)
+    meta = store.ratio_meta.iloc[columns]
+    names = [f"{category}/{name}" for category, name in zip(meta['category'], meta['ratio'])]
+    periods = store.period_labels[window]
+    per_chunk = max(1, chunk_rows // max(1, len(periods)))
+    for i in range(0, len(positions), per_chunk):
+        rows = list(positions[i:i + per_chunk])
+        block = store.values[rows][:, window][..., columns]
+        yield pd.DataFrame(
+            block.reshape(-1, len(columns)),
+            index=pd.MultiIndex.from_product([[store.companies[pos] for pos in rows], periods], names=['company', 'period']),
+            columns=names
+        )
+
+def download_formats():
+    """Download formats whose writer is installed; Excel needs xlsxwriter"""
+    return [fmt for fmt in DOWNLOAD_FORMATS if fmt != 'Excel' or importlib.util.find_spec('xlsxwriter')]
+
+def write_panel_chunks(chunks, fmt):
+    """Write DataFrame chunks to a spooled temporary file in one of DOWNLOAD_FORMATS, rewound for reading"""
+    out = tempfile.SpooledTemporaryFile(max_size=DOWNLOAD_SPOOL_BYTES)
+    if fmt in ('CSV', 'Parquet'):
+        import pyarrow as pa
+        import pyarrow.csv as pacsv
+        import pyarrow.parquet as pq
+        writer = None
+        for chunk in chunks:
+            table = pa.Table.from_pandas(chunk.reset_index(), preserve_index=False)
+            if writer is None:
+                writer = pacsv.CSVWriter(out, table.schema) if fmt == 'CSV' else pq.ParquetWriter(out, table.schema)
+            writer.write_table(table)
+        if writer is not None:
+            writer.close()
+    elif fmt == 'Excel':
+        import xlsxwriter
+        # constant_memory flushes every row once the next one starts, so the
+        # workbook never holds more than one row; rows must come in order
+        workbook = xlsxwriter.Workbook(out, {'constant_memory': True})
+        sheet = workbook.add_worksheet('Ratios')
+        row = 0
+        for chunk in chunks:
+            if row == 0:
+                sheet.write_row(0, 0, list(chunk.index.names) + list(chunk.columns))
+                row = 1
+            if row + len(chunk) > EXCEL_MAX_ROWS:
+                raise ValueError(f"More than {EXCEL_MAX_ROWS - 1} rows do not fit in one Excel sheet")
+            # Missing values become blank cells
+            cells = chunk.to_numpy(dtype=object)
+            cells[pd.isna(cells)] = None
+            for labels, values in zip(chunk.index, cells):
+                sheet.write_row(row, 0, (*labels, *values))
+                row += 1
+        workbook.close()
+    else:
+        raise ValueError(f"Unknown download format: {fmt}")
+    out.seek(0)
+    return out
+
+def build_ratio_trends(data):
+    """Serialized 2x2 grid of key ratio trends for the executive summary"""
+    # Create a comprehensive trend chart
+    fig_trends = plotly_subplots.make_subplots(
+        rows=2, cols=2,
+        subplot_titles=('Liquidity Ratios', 'Profitability Ratios', 'Solvency Ratios', 'Efficiency Ratios'),
+        vertical_spacing=0.1
+    )
+
+    # Liquidity Trends
+    fig_trends.add_trace(
+        go.Scatter(x=data.years, y=data['liquidity']['Current Ratio'],
+                  mode='lines+markers', name='Current Ratio', line=dict(color='#1f77b4')),
+        row=1, col=1
+    )
+    fig_trends.add_trace(
+        go.Scatter(x=data.years, y=data['liquidity']['Quick Ratio'],
+                  mode='lines+markers', name='Quick Ratio', line=dict(color='#ff7f0e')),
+        row=1, col=1
+    )
+
+    # Profitability Trends
+    fig_trends.add_trace(
+        go.Scatter(x=data.years, y=data['profitability']['Net Profit Margin (%)'],
+                  mode='lines+markers', name='Net Margin', line=dict(color='#2ca02c')),
+        row=1, col=2
+    )
+    fig_trends.add_trace(
+        go.Scatter(x=data.years, y=data['profitability']['Return on Equity (ROE) (%)'],
+                  mode='lines+markers', name='ROE', line=dict(color='#d62728')),
+        row=1, col=2
+    )
+
+    # Solvency Trends
+    fig_trends.add_trace(
+        go.Scatter(x=data.years, y=data['solvency']['Debt-to-Equity Ratio'],
+                  mode='lines+markers', name='D/E Ratio', line=dict(color='#9467bd')),
+        row=2, col=1
+    )
+
+    # Efficiency Trends (Asset Turnover)
+    # Handle Asset Turnover NaNs
+    years_at_clean, asset_turnover_clean = data.trimmed('dupont_3', 'Asset Turnover')
+    if len(asset_turnover_clean):
+        fig_trends.add_trace(
+            go.Scatter(x=years_at_clean, y=asset_turnover_clean,
+                      mode='lines+markers', name='Asset Turnover', line=dict(color='#8c564b')),
+            row=2, col=2
+        )
+
+    fig_trends.update_layout(height=400, showlegend=False)
+    return fig_trends.to_json()
+
+def build_performance_trends(data, health):
+    """Serialized 3x2 grid of long-run performance trends for the executive summary"""
+    # Create comprehensive trend analysis
+    fig_comprehensive = plotly_subplots.make_subplots(
+        rows=3, cols=2,
+        subplot_titles=('Profitability Trends', 'Liquidity Trends', 'Solvency Trends', 'Efficiency Trends',
+                       'ROE Components', 'Financial Health Score'),
+        vertical_spacing=0.08
+    )
+
+    # Profitability Trends
+    fig_comprehensive.add_trace(
+        go.Scatter(x=data.years, y=data['profitability']['Net Profit Margin (%)'],
+                  mode='lines+markers', name='Net Margin', line=dict(color='#1f77b4', width=2)),
+        row=1, col=1
+    )
+    fig_comprehensive.add_trace(
+        go.Scatter(x=data.years, y=data['profitability']['Return on Equity (ROE) (%)'],
+                  mode='lines+markers', name='ROE', line=dict(color='#ff7f0e', width=2)),
+        row=1, col=1
+    )
+
+    # Liquidity Trends
+    fig_comprehensive.add_trace(
+        go.Scatter(x=data.years, y=data['liquidity']['Current Ratio'],
+                  mode='lines+markers', name='Current Ratio', line=dict(color='#2ca02c', width=2)),
+        row=1, col=2
+    )
+    fig_comprehensive.add_trace(
+        go.Scatter(x=data.years, y=data['liquidity']['Quick Ratio'],
+                  mode='lines+markers', name='Quick Ratio', line=dict(color='#d62728', width=2)),
+        row=1, col=2
+    )
+
+    # Solvency Trends
+    fig_comprehensive.add_trace(
+        go.Scatter(x=data.years, y=data['solvency']['Debt-to-Equity Ratio'],
+                  mode='lines+markers', name='D/E Ratio', line=dict(color='#9467bd', width=2)),
+        row=2, col=1
+    )
+    fig_comprehensive.add_trace(
+        go.Scatter(x=data.years, y=data['solvency']['Debt Ratio'],
+                  mode='lines+markers', name='Debt Ratio', line=dict(color='#8c564b', width=2)),
+        row=2, col=1
+    )
+
+    # Efficiency Trends
+    # Handle Asset Turnover NaNs
+    years_clean, asset_turnover_clean = data.trimmed('dupont_3', 'Asset Turnover')
+    if len(asset_turnover_clean):
+        fig_comprehensive.add_trace(
+            go.Scatter(x=years_clean, y=asset_turnover_clean,
+                      mode='lines+markers', name='Asset Turnover', line=dict(color='#e377c2', width=2)),
+            row=2, col=2
+        )
+
+    # ROE Components (3-point DuPont)
+    # Handle ROE NaNs
+    years_roe, roe_clean = data.trimmed('dupont_3', 'ROE')
+    if len(roe_clean):
+        fig_comprehensive.add_trace(
+            go.Scatter(x=years_roe, y=roe_clean * 100,
+                      mode='lines+markers', name='ROE (3-Point)', line=dict(color='#7f7f7f', width=2)),
+            row=3, col=1
+        )
+
+
+    # Financial Health Score Trend
+    health_trend = health.history(data.key, data.window)
+    if health.latest_index(data.key, data.window) is not None:
+        fig_comprehensive.add_trace(
+            go.Scatter(x=data.years, y=health_trend,
+                      mode='lines+markers', name='Health Score', line=dict(color='#bcbd22', width=3)),
+            row=3, col=2
+        )
+
+    fig_comprehensive.update_layout(height=800, showlegend=False)
+    return fig_comprehensive.to_json()
+
+def build_returns_trends(data):
+    """Serialized ROA/ROE trend with asset turnover on a secondary axis"""
+    fig_returns = plotly_subplots.make_subplots(specs=[[{"secondary_y": True}]])
+
+    fig_returns.add_trace(
+        go.Scatter(x=data.years, y=data['profitability']['Return on Assets (ROA) (%)'],
+                  mode='lines+markers', name='ROA (%)',
+                  line=dict(color='#1f77b4', width=3)),
+        secondary_y=False
+    )
+
+    fig_returns.add_trace(
+        go.Scatter(x=data.years, y=data['profitability']['Return on Equity (ROE) (%)'],
+                  mode='lines+markers', name='ROE (%)',
+                  line=dict(color='#ff7f0e', width=3)),
+        secondary_y=False
+    )
+
+    # Add asset turnover on secondary axis
+    years_at, asset_turnover_clean = data.trimmed('dupont_3', 'Asset Turnover')
+    if len(asset_turnover_clean):
+        fig_returns.add_trace(
+            go.Scatter(x=years_at, y=asset_turnover_clean,
+                      mode='lines+markers', name='Asset Turnover',
+                      line=dict(color='#2ca02c', width=2, dash='dot')),
+            secondary_y=True
+        )
+
+    fig_returns.update_layout(
+        title="Returns & Efficiency Trends",
+        height=400
+    )
+
+    fig_returns.update_yaxes(title_text="Returns (%)", secondary_y=False)
+    fig_returns.update_yaxes(title_text="Asset Turnover", secondary_y=True)
+
+    return fig_returns.to_json()
+
+def build_dupont_components(data):
+    """Serialized 3x1 grid of the 3-point DuPont component trends"""
+    fig_components = plotly_subplots.make_subplots(
+        rows=3, cols=1,
+        subplot_titles=('Net Profit Margin Trend', 'Asset Turnover Trend', 'Equity Multiplier Trend'),
+        vertical_spacing=0.1
+    )
+
+    # NPM Trend
+    years_npm, npm_clean = data.trimmed('dupont_3', 'Net Profit Margin')
+    fig_components.add_trace(
+        go.Scatter(x=years_npm, y=npm_clean * 100, mode='lines+markers',
+                  name='NPM (%)', line=dict(color='#1f77b4', width=2)),
+        row=1, col=1
+    )
+
+    # Asset Turnover Trend
+    years_at, at_clean = data.trimmed('dupont_3', 'Asset Turnover')
+    fig_components.add_trace(
+        go.Scatter(x=years_at, y=at_clean, mode='lines+markers',
+                  name='Asset Turnover', line=dict(color='#ff7f0e', width=2)),
+        row=2, col=1
+    )
+
+    # Equity Multiplier Trend
+    years_em, em_clean = data.trimmed('dupont_3', 'Equity Multiplier')
+    fig_components.add_trace(
+        go.Scatter(x=years_em, y=em_clean, mode='lines+markers',
+                  name='Equity Multiplier', line=dict(color='#2ca02c', width=2)),
+        row=3, col=1
+    )
+
+    fig_components.update_layout(height=600, showlegend=False)
+
+    return fig_components.to_json()
+
+def build_health_radar(data, health, company):
+    """Serialized radar of the latest health dimension scores; the company must have one (see latest_index)"""
+    t = health.latest_index(data.key, data.window)
+    fig_radar = go.Figure()
+
+    fig_radar.add_trace(go.Scatterpolar(
+        r=list(health.latest_dimensions(data.key, window=data.window).values()),
+        theta=health.dimension_names,
+        fill='toself',
+        name=company,
+        line_color='#1f77b4'
+    ))
+
+    fig_radar.update_layout(
+        polar=dict(
+            radialaxis=dict(
+                visible=True,
+                range=[0, 10]
+            )),
+        showlegend=False,
+        title=f"Financial Health Dimensions ({data.years[t]})",
+        height=300
+    )
+
+    return fig_radar.to_json()
+
+def build_risk_heatmap(data, health):
+    """Serialized heatmap of the risk in each of RISK_DIMENSIONS: the shortfall of its latest score from 10"""
+    dimensions = health.latest_dimensions(data.key, RISK_DIMENSIONS, data.window)
+    risk_categories = list(dimensions)
+    risk_scores = [round(10 - score, 1) for score in dimensions.values()]
+    risk_levels = [risk_level(score) for score in risk_scores]
+
+    fig_heatmap = go.Figure(data=go.Heatmap(
+        z=[risk_scores],
+        x=risk_categories,
+        y=['Risk Score (1-10)'],
+        colorscale='RdYlGn_r',
+        text=[[f'{level}<br>Score: {score}' for level, score in zip(risk_levels, risk_scores)]],
+        texttemplate="%{text}",
+        textfont={"size": 10},
+        hoverongaps=False
+    ))
+
+    fig_heatmap.update_layout(
+        title="Key Risk Areas",
+        height=200,
+        xaxis_title="Risk Category",
+        yaxis_title=""
+    )
+
+    return fig_heatmap.to_json()
+
+def build_liquidity_trends(data):
+    """Serialized current and quick ratio areas with the cash ratio line and a 1.0 benchmark"""
+    fig_area = go.Figure()
+
+    # Current Ratio - Area chart
+    fig_area.add_trace(go.Scatter(
+        x=data.years,
+        y=data['liquidity']['Current Ratio'],
+        mode='lines',
+        name='Current Ratio',
+        fill='tozeroy',
+        line=dict(color='#1f77b4', width=2)
+    ))
+
+    # Quick Ratio - Area chart
+    fig_area.add_trace(go.Scatter(
+        x=data.years,
+        y=data['liquidity']['Quick Ratio'],
+        mode='lines',
+        name='Quick Ratio',
+        fill='tozeroy',
+        line=dict(color='#ff7f0e', width=2)
+    ))
+
+    # Cash Ratio - Line only (too small for area)
+    fig_area.add_trace(go.Scatter(
+        x=data.years,
+        y=data['liquidity']['Cash Ratio'],
+        mode='lines+markers',
+        name='Cash Ratio',
+        line=dict(color='#2ca02c', width=2)
+    ))
+
+    # Add benchmark line at 1.0
+    fig_area.add_hline(y=1.0, line_dash="dash", line_color="red",
+                      annotation_text="Healthy Threshold", annotation_position="top right")
+
+    fig_area.update_layout(
+        title=f"Liquidity Ratios Trend ({data.period_range}) - Area Chart",
+        xaxis_title=data.period_axis,
+        yaxis_title="Ratio",
+        height=400
+    )
+
+    return fig_area.to_json()
+
+def build_leverage_trend(data):
+    """Serialized debt-to-equity trend against the 1.0 threshold"""
+    fig_trend = go.Figure()
+
+    fig_trend.add_trace(go.Scatter(
+        x=data.years,
+        y=data['solvency']['Debt-to-Equity Ratio'],
+        mode='lines+markers',
+        name='D/E Ratio',
+        line=dict(color='#9467bd', width=3)
+    ))
+
+    fig_trend.add_hline(y=1.0, line_dash="dash", line_color="red",
+                      annotation_text="D/E Threshold (1.0)", annotation_position="top right")
+
+    fig_trend.update_layout(
+        title=f"Debt-to-Equity Ratio Trend ({data.period_range})",
+        xaxis_title=data.period_axis,
+        yaxis_title="D/E Ratio",
+        height=400
+    )
+
+    return fig_trend.to_json()
+
+def build_margin_trends(data):
+    """Serialized gross, operating and net margin areas"""
+    fig_margins = go.Figure()
+
+    # Area charts for margins
+    fig_margins.add_trace(go.Scatter(
+        x=data.years,
+        y=data['profitability']['Gross Profit Margin (%)'],
+        mode='lines+markers',
+        name='Gross Margin',
+        fill='tozeroy',
+        line=dict(color='#1f77b4', width=2)
+    ))
+
+    fig_margins.add_trace(go.Scatter(
+        x=data.years,
+        y=data['profitability']['Operating Profit Margin (%)'],
+        mode='lines+markers',
+        name='Operating Margin',
+        fill='tozeroy',
+        line=dict(color='#ff7f0e', width=2)
+    ))
+
+    fig_margins.add_trace(go.Scatter(
+        x=data.years,
+        y=data['profitability']['Net Profit Margin (%)'],
+        mode='lines+markers',
+        name='Net Margin',
+        fill='tozeroy',
+        line=dict(color='#2ca02c', width=2)
+    ))
+
+    fig_margins.update_layout(
+        title=f"Margin Trends ({data.period_range})",
+        xaxis_title=data.period_axis,
+        yaxis_title="Margin (%)",
+        height=400
+    )
+
+    return fig_margins.to_json()
+
+def build_roe_waterfall(data):
+    """
+    Serialized waterfall of the 3-point ROE in the last period where ROE, net
+    margin and asset turnover are all reported: margin, then the asset turnover
+    and leverage effects
+    """
+    t = data.latest_common('dupont_3', 'ROE', 'Net Profit Margin', 'Asset Turnover')
+    npm_val = data['dupont_3']['Net Profit Margin'][t]
+    at_val = data['dupont_3']['Asset Turnover'][t]
+    roe_val = data['dupont_3']['ROE'][t] * 100
+    steps = [npm_val * 100, (npm_val * at_val * 100) - (npm_val * 100), roe_val - (npm_val * at_val * 100), roe_val]
+
+    # Use explicit absolute/relative measures for clarity
+    fig_waterfall_3pt = go.Figure(go.Waterfall(
+        name="3-Point ROE",
+        orientation="v",
+        measure=["absolute", "relative", "relative", "total"],
+        x=['Net Profit Margin', 'Asset Turnover Effect', 'Leverage Effect', 'Return on Equity'],
+        y=steps,
+        text=[f"{y:.1f}%" for y in steps],
+        connector={"line":{"color":"rgb(63, 63, 63)"}}
+    ))
+
+    fig_waterfall_3pt.update_layout(
+        title=f"3-Point ROE Decomposition ({data.years[t]})",
+        height=400,
+        waterfallgap=0.3
+    )
+
+    return fig_waterfall_3pt.to_json()
+
+def build_normalized_drivers(data):
+    """Serialized ROE, net margin and asset turnover, each min-max scaled over the periods all three report"""
+    span = data.valid_span('dupont_3', 'ROE', 'Net Profit Margin', 'Asset Turnover')
+    roe_clean = data['dupont_3']['ROE'][span]
+    npm_clean = data['dupont_3']['Net Profit Margin'][span]
+    at_clean = data['dupont_3']['Asset Turnover'][span]
+    years_norm = data.period_labels[span]
+
+    roe_norm = (roe_clean - roe_clean.min()) / (roe_clean.max() - roe_clean.min())
+    npm_norm = (npm_clean - npm_clean.min()) / (npm_clean.max() - npm_clean.min())
+    at_norm = (at_clean - at_clean.min()) / (at_clean.max() - at_clean.min())
+
+    fig_norm = go.Figure()
+
+    fig_norm.add_trace(go.Scatter(x=years_norm, y=roe_norm, mode='lines+markers', name='Normalized ROE', line=dict(color='#d62728', width=3)))
+    fig_norm.add_trace(go.Scatter(x=years_norm, y=npm_norm, mode='lines', name='Normalized NPM', line=dict(color='#1f77b4', dash='dot')))
+    fig_norm.add_trace(go.Scatter(x=years_norm, y=at_norm, mode='lines', name='Normalized AT', line=dict(color='#ff7f0e', dash='dot')))
+
+    fig_norm.update_layout(
+        title="Normalized Drivers of ROE",
+        xaxis_title=data.period_axis,
+        yaxis_title="Normalized Value (0 to 1)",
+        height=400
+    )
+
+    return fig_norm.to_json()
+
+# Comparison metrics as (category, ratio, label, higher is better)
+COMPARISON_METRICS = (
+    ('liquidity', 'Current Ratio', 'Current Ratio', True),
+    ('liquidity', 'Quick Ratio', 'Quick Ratio', True),
+    ('solvency', 'Debt-to-Equity Ratio', 'Debt-to-Equity Ratio', False),
+    ('solvency', 'Times Interest Earned', 'Times Interest Earned', True),
+    ('profitability', 'Net Profit Margin (%)', 'Net Profit Margin', True),
+    ('profitability', 'Return on Equity (ROE) (%)', 'Return on Equity (ROE) (%)', True),
+    ('dupont_3', 'Asset Turnover', 'Asset Turnover', True),
+)
+
+class PeerComparison:
+    """
+    Latest value, the period position it was reported at, rank (1 = best,
+    tied values sharing the best rank of the tie) and percentile (100 =
+    best) of every comparison metric for a set of companies, as (company,
+    metric) arrays. Missing values have period -1 and NaN rank and percentile.
+    """
+
+    def __init__(self, positions, metrics, latest, periods, ranks, percentiles):
+        self.positions = positions
+        self.metrics = metrics
+        self.latest = latest
+        self.periods = periods
+        self.ranks = ranks
+        self.percentiles = percentiles
+        self.counts = (~np.isnan(latest)).sum(axis=0)
+        self.leaders = (ranks == 1).sum(axis=0)
+
+    def best(self):
+        """Row of the sole top-ranked company per metric, -1 where no company has a value or the top rank is tied"""
+        return np.where(self.leaders == 1, np.argmin(np.where(np.isnan(self.ranks), np.inf, self.ranks), axis=0), -1)
+
+def compare_peers(store, positions, metrics=COMPARISON_METRICS):
+    """Rank and percentile every company in `positions` on `metrics`, in one pass over the peer matrix"""
+    positions = np.asarray(positions, dtype=np.intp)
+    available = [(category, name) in store._ratio_pos for category, name, _, _ in metrics]
+    columns = np.array([
+        store.ratio_index(category, name) if ok else 0
+        for (category, name, _, _), ok in zip(metrics, available)
+    ], dtype=np.intp)
+
+    # Latest valid value of each (company, metric) via the store's validity index
+    last = store.last_valid[positions[:, None], columns[None, :]]
+    latest = store.values[positions[:, None], np.maximum(last, 0), columns[None, :]]
+    latest = np.where((last >= 0) & np.array(available), latest, np.nan)
+
+    # Rank on a "larger is better" key; missing values sort last. Tied
+    # values all take the rank of the first of them in the sorted column
+    higher = np.array([higher_is_better for *_, higher_is_better in metrics])
+    key = np.where(np.isnan(latest), -np.inf, np.where(higher, latest, -latest))
+    order = np.argsort(-key, axis=0, kind='stable')
+    ordered = np.take_along_axis(key, order, axis=0)
+    starts = np.ones(key.shape, dtype=bool)
+    starts[1:] = ordered[1:] != ordered[:-1]
+    places = np.broadcast_to(np.arange(len(positions))[:, None], key.shape)
+    ranks = np.empty(latest.shape)
+    np.put_along_axis(ranks, order, np.maximum.accumulate(np.where(starts, places, 0), axis=0) + 1.0, axis=0)
+    ranks[np.isnan(latest)] = np.nan
+
+    counts = (~np.isnan(latest)).sum(axis=0)
+    percentiles = np.where(counts > 1, (counts - ranks) / np.maximum(counts - 1, 1) * 100, 100.0)
+    percentiles[np.isnan(latest)] = np.nan
+    periods = np.where(np.isnan(latest), -1, last)
+    return PeerComparison(positions, metrics, latest, periods, ranks, percentiles)
+
+def format_metrics(values, names):
+    """Display strings for a (..., metric) array of values, "N/A" where missing"""
+    suffixes = np.array(['%' if name.endswith('(%)') else 'x' for name in names])
+    return np.where(np.isnan(values), "N/A", np.char.add(np.char.mod('%.2f', values), suffixes))
+
+def build_comparison_radar(categories, traces):
+    """Serialized radar of (name, scores) traces over `categories`, the first one (the selected company) opaque"""
+    palette = plotly_colors.qualitative.D3
+    fig_radar_comp = go.Figure()
+
+    for i, (name, scores) in enumerate(traces):
+        fig_radar_comp.add_trace(go.Scatterpolar(
+            r=scores,
+            theta=categories,
+            fill='toself',
+            name=name,
+            line_color=palette[i % len(palette)],
+            opacity=1.0 if i == 0 else 0.7
+        ))
+
+    fig_radar_comp.update_layout(
+        polar=dict(
+            radialaxis=dict(
+                visible=True,
+                range=[0, 10]
+            )),
+        showlegend=True,
+        title="Financial Dimension Scores",
+        height=400
+    )
+
+    return fig_radar_comp.to_json()
+
+def report_slug(text):
+    return re.sub(r'[^a-z0-9]+', '-', text.casefold()).strip('-')